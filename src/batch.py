@@ -0,0 +1,72 @@
+#batch prediction
+#
+# Scoring a very large input in one process leaves the other cores idle and
+# needs the whole input in memory. predict_chunks() takes the input as an
+# iterator of chunks, scores them on a pool of processes and yields the
+# results in input order, with only a few chunks in flight at any time.
+# Every worker gets the compiled tree once, when it starts: with the fork
+# start method it is inherited (a model from ID3.load() even keeps sharing
+# the file's pages), so tasks carry only their chunk.
+
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from tabular import is_table, table_columns
+
+_worker = {}
+
+
+def _init_worker(compiled, columns, proba):
+    _worker.update(compiled=compiled, columns=columns, proba=proba)
+
+
+def _score(chunk):
+    w = _worker
+    return score_chunk(w["compiled"], chunk, w["columns"], w["proba"])
+
+
+def score_chunk(compiled, chunk, columns=None, proba=False):
+    """
+    Labels (or class probabilities) of one chunk: row dicts, a DataFrame or a
+    2-D ndarray whose columns are `columns`.
+    """
+    if is_table(chunk):
+        table = table_columns(chunk, columns)
+        if proba:
+            return compiled.predict_proba_table(table, len(chunk))
+        return compiled.predict_table(table, len(chunk))
+    return compiled.predict_proba(chunk) if proba else compiled.predict(chunk)
+
+
+def predict_chunks(compiled, chunks, n_jobs=2, columns=None, proba=False, max_pending=None):
+    """
+    Score an iterable of chunks with a CompiledTree on n_jobs processes.
+
+    Steps:
+        submit  - chunks are read lazily; at most max_pending (default
+                  2 · n_jobs) are being scored or waiting to be yielded
+        yield   - results leave in input order, one array per chunk
+
+    Closing the generator early cancels the chunks not started yet.
+    """
+    if n_jobs < 2:
+        for chunk in chunks:
+            yield score_chunk(compiled, chunk, columns, proba)
+        return
+
+    max_pending = max_pending or 2 * n_jobs
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    pool = ProcessPoolExecutor(n_jobs, mp_context=context, initializer=_init_worker,
+                               initargs=(compiled, columns, proba))
+    pending = deque()
+    try:
+        for chunk in chunks:
+            # a generator of rows cannot be sent to a worker
+            pending.append(pool.submit(_score, chunk if is_table(chunk) else list(chunk)))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        pool.shutdown(cancel_futures=True)
@@ -0,0 +1,126 @@
+#generated predictor
+#
+# For single rows the per-node dict checks of id3.walk() and the NumPy calls
+# of compiled.CompiledTree cost more than the decisions themselves. Here the
+# fitted tree is written out as Python source, nested ifs with one dict
+# lookup per value node, and compiled once into a plain function.
+
+import math
+
+# nesting per generated function; deeper subtrees continue in helper functions
+MAX_NESTING = 40
+
+
+def literal(value, consts):
+    # source text for a constant: a literal when it round-trips, else a module name
+    if type(value) in (str, int, bool, type(None)) or (type(value) is float and math.isfinite(value)):
+        return repr(value)
+    name = f"_c{len(consts)}"
+    consts[name] = value
+    return name
+
+
+def generate_source(tree, name="predict"):
+    """
+    Python source of a function name(sample) -> label that follows `tree`
+    exactly like id3.walk(sample).
+
+    Steps:
+        bind      - every tested attribute is read once per path into a local v<j>
+        threshold - `if v <= t:` on the bound value; a missing (None) value takes the default
+        value     - with only leaf children, return table.get(v, default); otherwise
+                    k = table.get(v, 0) picks the branch: branch 0 is the default and
+                    every leaf child with the default label, other leaf labels share
+                    one branch each, subtrees get their own
+
+    Returns:
+        tuple: (source, namespace) - the namespace holds the tables and the
+               constants without a literal form; exec the source in it
+    """
+    consts = {}
+    columns = {}
+    functions = [(name, tree)]
+    lines = []
+
+    for fn_name, root in functions:
+        lines.append(f"def {fn_name}(sample):")
+        lines.append("    get = sample.get")
+        # work item: (indent, node, bound attributes) or (indent, text)
+        stack = [(1, root, frozenset())]
+        while stack:
+            item = stack.pop()
+            if len(item) == 2:
+                lines.append("    " * item[0] + item[1])
+                continue
+            indent, node, bound = item
+            pad = "    " * indent
+            if not isinstance(node, dict):
+                lines.append(f"{pad}return {literal(node, consts)}")
+                continue
+            if indent > MAX_NESTING:
+                helper = f"_n{len(functions)}"
+                functions.append((helper, node))
+                lines.append(f"{pad}return {helper}(sample)")
+                continue
+
+            attr = node["attr"]
+            default = literal(node["default"], consts)
+            children = node["children"]
+            leaves = "threshold" not in node and all(not isinstance(c, dict) for c in children.values())
+            if leaves and all((type(c), c) == (type(node["default"]), node["default"]) for c in children.values()):
+                # every value ends in the default label, no need to look
+                lines.append(f"{pad}return {default}")
+                continue
+            v = f"v{columns.setdefault(attr, len(columns))}"
+            if attr not in bound:
+                lines.append(f"{pad}{v} = get({literal(attr, consts)})")
+                bound = bound | {attr}
+            todo = []
+            if "threshold" in node:
+                lines.append(f"{pad}if {v} is None:")
+                lines.append(f"{pad}    return {default}")
+                lines.append(f"{pad}if {v} <= {literal(node['threshold'], consts)}:")
+                todo.append((indent + 1, children[True], bound) if True in children else (indent + 1, f"return {default}"))
+                todo.append((indent, "else:"))
+                todo.append((indent + 1, children[False], bound) if False in children else (indent + 1, f"return {default}"))
+            elif leaves:
+                # one lookup straight to the label
+                name_t = f"_t{len(consts)}"
+                consts[name_t] = dict(children)
+                lines.append(f"{pad}return {name_t}.get({v}, {default})")
+            else:
+                table, branches, labels = {}, [], {}
+                for value, child in children.items():
+                    if not isinstance(child, dict):
+                        key = (type(child), child)
+                        if key == (type(node["default"]), node["default"]):
+                            continue
+                        if key in labels:
+                            table[value] = labels[key]
+                            continue
+                        labels[key] = len(branches) + 1
+                    table[value] = len(branches) + 1
+                    branches.append(child)
+                name_t = f"_t{len(consts)}"
+                consts[name_t] = table
+                lines.append(f"{pad}k = {name_t}.get({v}, 0)")
+                for i, child in enumerate(branches, 1):
+                    todo.append((indent, f"if k == {i}:"))
+                    todo.append((indent + 1, child, bound))
+                todo.append((indent, f"return {default}"))
+            stack.extend(reversed(todo))
+        lines.append("")
+
+    return "\n".join(lines), consts
+
+
+def compile_predictor(tree, name="predict"):
+    """
+    Compile generate_source(tree) once and return the function;
+    its source is kept in the function's `source` attribute.
+    """
+    source, namespace = generate_source(tree, name)
+    exec(compile(source, f"<id3 {name}>", "exec"), namespace)
+    fn = namespace[name]
+    fn.source = source
+    return fn
@@ -0,0 +1,806 @@
+#columnar id3 engine
+#
+# The dict path (id3.id3) looks every value up through row[...] at every node.
+# Here each attribute and the label are integer-encoded once into NumPy arrays
+# and all split statistics come from bincount contingency tables.
+
+import multiprocessing
+import numpy as np
+import pandas as pd
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from selection import TIE_TOL
+from compiled import LeafCounts
+from criteria import entropy_gain, get_criterion, cut_scores, score_range, hoeffding_bound
+
+
+def encode(dataset, attributes, label_key):
+    """
+    Integer-encode a list of dicts once.
+
+    Steps:
+        categories  - sorted distinct values of every attribute
+        X           - (n_rows, n_attrs) codes, column-major so each attribute is contiguous
+        classes     - distinct labels in order of first appearance
+        y           - label codes
+
+    Returns:
+        tuple: (X, y, categories, classes)
+    """
+    n = len(dataset)
+    X = np.empty((n, len(attributes)), dtype=np.int32, order="F")
+    categories = []
+    for j, a in enumerate(attributes):
+        column = [row[a] for row in dataset]
+        values = set(column)
+        if any(v != v for v in values):
+            raise ValueError(f"Attribute {a!r} has missing (NaN) values.")
+        values = sorted(values)
+        index = {v: i for i, v in enumerate(values)}
+        X[:, j] = np.fromiter((index[v] for v in column), dtype=np.int32, count=n)
+        categories.append(values)
+
+    labels = [row[label_key] for row in dataset]
+    classes = list(dict.fromkeys(labels))
+    index = {c: i for i, c in enumerate(classes)}
+    y = np.fromiter((index[c] for c in labels), dtype=np.int32, count=n)
+    return X, y, categories, classes
+
+
+def weighted_count(keys, weights, minlength):
+    """
+    np.bincount(keys) that adds weights[i] for keys[i] instead of 1 when
+    weights are given; integer weights keep integer counts.
+    """
+    if weights is None:
+        return np.bincount(keys, minlength=minlength)
+    counts = np.bincount(keys, weights=weights, minlength=minlength)
+    return counts.astype(np.int64) if weights.dtype.kind in "iu" else counts
+
+
+def contingency(X, labels, rows, attrs, n_values, n_classes, weights=None):
+    """
+    Value × class count tables of all attributes in `attrs` over a node's rows,
+    from a single bincount. Every attribute owns a block of n_values[a] table
+    rows starting at starts[i]. weights (one per row of `rows`) gives
+    weighted counts.
+
+    Returns:
+        tuple: (table, starts) with table of shape (Σ n_values, n_classes)
+    """
+    # integer even without attributes, so the bincount keys stay integer
+    V = np.array([n_values[a] for a in attrs], dtype=np.intp)
+    starts = np.cumsum(V) - V
+    key = (X[np.ix_(rows, attrs)] + starts) * n_classes + labels[:, None]
+    if weights is not None:
+        weights = np.broadcast_to(weights[:, None], key.shape).ravel()
+    table = weighted_count(key.ravel(), weights, V.sum() * n_classes)
+    return table.reshape(-1, n_classes), starts
+
+
+def best_attribute(gains):
+    """
+    Index of the first attribute whose gain is within TIE_TOL of the maximum,
+    the same rule as selection.argmax_gain on the dict path.
+    """
+    gains = np.asarray(gains, dtype=np.float64)
+    return int(np.flatnonzero(gains >= gains.max() - TIE_TOL)[0])
+
+
+def majority(labels, counts):
+    """
+    Majority class code; ties go to the class seen first in `labels`,
+    like Counter(labels).most_common(1).
+    """
+    return int(labels[np.argmax(counts[labels] == counts.max())])
+
+
+# nodes with fewer row × attribute cells than this are scored on one thread
+THREAD_MIN_CELLS = 1 << 20
+
+
+def map_attributes(score, attrs, pool=None, n_jobs=1, cells=0):
+    """
+    Run score(chunk) over contiguous chunks of `attrs` on a thread pool and join
+    the results along the last axis, in attribute order. bincount and the
+    ufunc kernels release the GIL, so threads scale without pickling anything.
+    """
+    if pool is None or n_jobs < 2 or len(attrs) < 2 or cells < THREAD_MIN_CELLS:
+        return score(attrs)
+    chunks = [c for c in np.array_split(np.asarray(attrs), n_jobs) if len(c)]
+    return np.concatenate(list(pool.map(score, chunks)), axis=-1)
+
+
+def gains(X, y, rows, attrs, n_values, n_classes, pool=None, n_jobs=1, weights=None, score=entropy_gain):
+    """
+    Split score (criteria.py function, information gain by default) of every
+    attribute in `attrs` over the rows `rows`, weighted by weights[rows] if given.
+
+    Returns:
+        ndarray: one score per entry of attrs
+    """
+    labels = y[rows]
+    w = None if weights is None else weights[rows]
+    counts = weighted_count(labels, w, n_classes)
+
+    def chunk(attrs):
+        table, starts = contingency(X, labels, rows, attrs, n_values, n_classes, w)
+        return score(table, starts, counts)
+
+    return map_attributes(chunk, attrs, pool, n_jobs, len(rows) * len(attrs))
+
+
+def partition(index, start, end, codes, n_values):
+    """
+    Stable counting sort of index[start:end] by attribute code, in place.
+    Rows keep their original order inside every child.
+
+    Returns:
+        tuple: (counts, bounds) - child v owns index[bounds[v]:bounds[v + 1]]
+    """
+    counts = np.bincount(codes, minlength=n_values)
+    # numpy radix-sorts 16-bit keys
+    keys = codes.astype(np.uint16) if n_values <= 1 << 16 else codes
+    index[start:end] = index[start:end][np.argsort(keys, kind="stable")]
+    bounds = start + np.concatenate(([0], np.cumsum(counts)))
+    return counts, bounds
+
+
+def threshold_gains(codes, labels, sizes, n_classes, weights=None, score=entropy_gain):
+    """
+    Best binary cut of one numeric attribute for every node, in a single sweep
+    over its presorted rows: node i owns the next sizes[i] entries of codes and
+    labels, sorted by code. Cuts lie between consecutive distinct codes and
+    their class counts come from one running cumulative sum, so no candidate
+    is counted from scratch. weights (one per entry) gives weighted counts and
+    score (a criteria.py function) rates the cuts, by information gain by default.
+
+    Returns:
+        tuple: (gain, lo, hi) per node - rows with code <= lo go left and hi is
+               the first code on the right; gain is -inf and lo = hi = -1 when
+               all rows of a node share one code
+    """
+    m = len(sizes)
+    sizes = np.asarray(sizes, dtype=np.intp)
+    ends = np.cumsum(sizes)
+    begins = ends - sizes
+    nid = np.repeat(np.arange(m), sizes)
+    # cum[p] = class counts of the first p rows
+    weighted = weights is not None and weights.dtype.kind not in "iu"
+    cum = np.zeros((len(codes) + 1, n_classes), dtype=np.float64 if weighted else np.intp)
+    cum[np.arange(1, len(codes) + 1), labels] = 1 if weights is None else weights
+    np.cumsum(cum, axis=0, out=cum)
+
+    # cut after position p: the next row is in the same node and has a larger code
+    p = np.flatnonzero((codes[1:] != codes[:-1]) & (nid[1:] == nid[:-1]))
+    seg = nid[p]
+    total = cum[ends] - cum[begins]
+    left = cum[p + 1] - cum[begins[seg]]
+    cut_gains = cut_scores(score, left, total[seg])
+
+    top = np.full(m, -np.inf)
+    np.maximum.at(top, seg, cut_gains)
+    # lowest cut within TIE_TOL of the node's best
+    hit = np.flatnonzero(cut_gains >= top[seg] - TIE_TOL)
+    hit = hit[np.unique(seg[hit], return_index=True)[1]]
+    gain = np.full(m, -np.inf)
+    lo = np.full(m, -1, dtype=np.intp)
+    hi = np.full(m, -1, dtype=np.intp)
+    gain[seg[hit]] = cut_gains[hit]
+    lo[seg[hit]] = codes[p[hit]]
+    hi[seg[hit]] = codes[p[hit] + 1]
+    return gain, lo, hi
+
+
+def midpoint(a, b):
+    """
+    Threshold between two adjacent sorted values, so that a <= t < b.
+    """
+    t = a + (b - a) / 2
+    # adjacent floats have no value in between
+    return a if t >= b else t
+
+
+# upper bound on node × value × class cells counted at once in breadth-first order
+LEVEL_CELLS = 1 << 22
+
+
+def level_gains(X, rows, labels, nid, sizes, n_values, n_classes, attrs, counts, weights=None, score=entropy_gain):
+    """
+    Split scores of the attributes `attrs` for every node of a tree level,
+    from one batched bincount per chunk of nodes. `rows` are grouped by node,
+    nid[i] is the (0..m-1) node of rows[i] and counts holds the (m, n_classes)
+    class counts of the nodes. With weights (one per entry of rows) counts
+    are weighted. score is a criteria.py function.
+
+    Returns:
+        ndarray: (m, len(attrs)) scores
+    """
+    m, n_attrs = len(sizes), len(attrs)
+    V = np.asarray(n_values)[attrs]
+    starts = np.concatenate(([0], np.cumsum(V)[:-1]))
+    width = V.sum() * n_classes
+    bounds = np.concatenate(([0], np.cumsum(sizes)))
+    step = max(1, LEVEL_CELLS // width)
+
+    out = np.empty((m, n_attrs))
+    for a in range(0, m, step):
+        b = min(a + step, m)
+        lo, hi = bounds[a], bounds[b]
+        local = nid[lo:hi] - a
+        key = (local[:, None] * V.sum() + starts + X[np.ix_(rows[lo:hi], attrs)]) * n_classes + labels[lo:hi, None]
+        w = None if weights is None else np.broadcast_to(weights[lo:hi, None], key.shape).ravel()
+        table = weighted_count(key.ravel(), w, (b - a) * width).reshape(b - a, -1, n_classes)
+        out[a:b] = score(table, starts, counts[a:b])
+    return out
+
+
+def n_features(max_features, n):
+    """
+    Attributes scored per node out of n: max_features is None (all of
+    them), a count, a fraction in (0, 1], "sqrt" or "log2"; at least 1.
+    """
+    if max_features is None:
+        return n
+    if max_features == "sqrt":
+        return max(1, int(np.sqrt(n)))
+    if max_features == "log2":
+        return max(1, int(np.log2(max(n, 1))))
+    if isinstance(max_features, (int, np.integer)) and not isinstance(max_features, bool) and max_features >= 1:
+        return int(max_features)
+    if isinstance(max_features, float) and 0 < max_features <= 1:
+        return max(1, int(max_features * n))
+    raise ValueError(f"max_features must be None, a positive int, a fraction in (0, 1], 'sqrt' or 'log2', "
+                     f"got {max_features!r}.")
+
+
+def as_seed(random_state):
+    # random_state (None, an int or a SeedSequence) as a SeedSequence
+    if isinstance(random_state, np.random.SeedSequence):
+        return random_state
+    return np.random.SeedSequence(random_state)
+
+
+def node_rng(seed, path):
+    """
+    Random generator of the node at `path` (child ordinals from the root of
+    the build) under the SeedSequence `seed`. A node draws the same numbers
+    in every build order and worker process, so the tree does not depend on
+    either.
+    """
+    return np.random.default_rng(np.random.SeedSequence(seed.entropy, spawn_key=seed.spawn_key + path))
+
+
+# a node is scored on a sample of sample_rows rows only if it has at least this many rows per sampled row
+SAMPLE_MIN_RATIO = 4
+
+
+def build(X, y, attributes, categories, classes, rows, attrs, order="depth", offload=None, n_jobs=1,
+          numeric=(), leaf_counts=None, sample_weight=None, criterion="entropy", max_features=None,
+          sample_rows=None, delta=1e-7, random_state=None, path=()):
+    """
+    Grow the ID3 tree over `rows` with the remaining attribute indices `attrs`.
+    Produces the same nested dict as id3.id3() on the decoded data.
+
+    Every node owns a contiguous slice of one shared index buffer, which is
+    partitioned in place, so the build needs O(N) memory instead of a row
+    subset per node and depth.
+
+    Nodes are expanded from an explicit work queue, not by recursion:
+        order="depth"   - depth-first, one node at a time
+        order="breadth" - level by level; all nodes of a level are scored
+                          and partitioned in batched passes over the data
+
+    Attributes in `numeric` get C4.5-style binary splits
+    {"attr", "threshold", "children": {True: <= threshold, False: > threshold}, "default"}
+    and stay available below them. Each keeps its own index buffer, sorted by
+    the attribute once here and then stably partitioned along with the main
+    one, so every node's slice of it is still sorted and is never re-sorted.
+
+    offload(rows, attrs) may return a future for a child subtree, which is then
+    built elsewhere and filled in once every local node is done; with
+    leaf_counts the future yields (subtree, its LeafCounts.gather() rows).
+    n_jobs > 1 scores the attributes of large nodes on that many threads.
+    leaf_counts (compiled.LeafCounts) receives the class counts of every leaf.
+    sample_weight (one positive weight per row of X) makes every count a sum
+    of weights: majorities, gains and leaf counts are weighted.
+    criterion picks the split score, a criteria.CRITERIA name or function.
+
+    For huge nodes, two options trade exactness for speed:
+        max_features - every node scores a random subset of
+                       n_features(max_features, len(attributes)) of its
+                       attributes (random subspace)
+        sample_rows  - a node with at least SAMPLE_MIN_RATIO × sample_rows
+                       rows is first scored on sample_rows rows drawn with
+                       replacement (by weight). The sample's best attribute is
+                       taken if its score beats the runner-up's by more than
+                       the Hoeffding bound ε(R, delta, sample_rows), R the
+                       criterion's score_range(); otherwise the node is scored
+                       exactly. A numeric winner is cut exactly on all rows.
+    Children are always partitioned and counted on all rows. The draws come
+    from node_rng(random_state, path) (path: the root's path, for subtrees),
+    so a seed gives the same tree in every build order and with n_jobs.
+    """
+    if order not in ("depth", "breadth"):
+        raise ValueError(f"Unknown build order {order!r}, expected 'depth' or 'breadth'.")
+    n_values = [len(c) for c in categories]
+    n_classes = len(classes)
+    index = np.array(rows, dtype=np.intp)
+    w = sample_weight
+    score = get_criterion(criterion)
+    n_draw = n_features(max_features, len(attributes))
+    seed = as_seed(random_state)
+    if sample_rows is not None and score_range(score, 2) is None:
+        raise ValueError("sample_rows needs a built-in criterion, the score range of a function is unknown.")
+    numeric = frozenset(numeric)
+    presorted = {a: index[np.argsort(X[index, a], kind="stable")] for a in attrs if a in numeric}
+    nominal = np.array([a for a in range(X.shape[1]) if a not in numeric], dtype=np.intp)
+    width = max([n_values[a] for a in nominal] + [2])
+    # child key of every row of the node(s) being split, for the presorted buffers
+    side = np.zeros(X.shape[0], dtype=np.intp) if presorted else None
+    pool = ThreadPoolExecutor(n_jobs) if n_jobs > 1 else None
+    if leaf_counts is not None:
+        leaf_counts.classes = list(classes)
+
+    def follow(positions, rows, keys):
+        # partition the presorted buffers like the main index, keeping each slice sorted
+        side[rows] = keys
+        for buffer in presorted.values():
+            part = buffer[positions]
+            buffer[positions] = part[np.argsort(side[part], kind="stable")]
+
+    def children(best, child_counts, bounds):
+        if best in numeric:
+            return [(key, bounds[v], bounds[v + 1]) for v, key in enumerate((True, False)) if child_counts[v]]
+        return [(categories[best][v], bounds[v], bounds[v + 1]) for v in np.flatnonzero(child_counts)]
+
+    def make_node(best, cut, default):
+        node = {"attr": attributes[best]}
+        if best in numeric:
+            node["threshold"] = midpoint(categories[best][cut[0]], categories[best][cut[1]])
+        node["children"] = {}
+        node["default"] = default
+        return node
+
+    def node_scores(rows, parts, attrs, weights):
+        # scores of attrs over rows and {numeric attribute: (lo, hi) cut};
+        # parts[a] holds the rows sorted by numeric attribute a
+        scores = np.full(len(attrs), -np.inf)
+        cuts = {}
+        cat = [i for i, a in enumerate(attrs) if a not in numeric]
+        if cat:
+            scores[cat] = gains(X, y, rows, [attrs[i] for i in cat], n_values, n_classes, pool, n_jobs, weights,
+                                score)
+        num = [i for i, a in enumerate(attrs) if a in numeric]
+        if num:
+            # one sweep over all numeric attributes, each one a segment
+            codes = np.concatenate([X[parts[attrs[i]], attrs[i]] for i in num])
+            part_rows = np.concatenate([parts[attrs[i]] for i in num])
+            gain, lo, hi = threshold_gains(codes, y[part_rows], [len(rows)] * len(num), n_classes,
+                                           None if weights is None else weights[part_rows], score)
+            scores[num] = gain
+            cuts = {attrs[i]: (lo[k], hi[k]) for k, i in enumerate(num)}
+        return scores, cuts
+
+    def candidates(attrs, path, n_rows):
+        # the attributes the node scores (max_features of them) and the
+        # generator to sample its rows with, None to score them exactly
+        sample = sample_rows is not None and n_rows >= SAMPLE_MIN_RATIO * sample_rows
+        if n_draw >= len(attrs) and not sample:
+            return attrs, None
+        rng = node_rng(seed, path)
+        if n_draw < len(attrs):
+            attrs = [attrs[i] for i in np.sort(rng.choice(len(attrs), n_draw, replace=False))]
+        return attrs, rng if sample and len(attrs) > 1 else None
+
+    def sampled_best(rows, attrs, counts, rng):
+        # the best of attrs on a row sample if it beats the runner-up by more
+        # than the Hoeffding bound, else None; R comes from the node's classes
+        if w is None:
+            sample = rows[rng.integers(0, len(rows), sample_rows)]
+        else:
+            p = w[rows]
+            sample = rows[rng.choice(len(rows), sample_rows, p=p / p.sum())]
+        sample.sort()
+        parts = {a: sample[np.argsort(X[sample, a], kind="stable")] for a in attrs if a in numeric}
+        scores, _ = node_scores(sample, parts, attrs, None)
+        runner_up, top = np.sort(scores)[-2:]
+        if top - runner_up > hoeffding_bound(score_range(score, np.count_nonzero(counts)), delta, sample_rows):
+            return attrs[int(np.argmax(scores))]
+        return None
+
+    def exact_cut(start, end, a):
+        # (lo, hi) cut of numeric attribute a over all rows of the node
+        part = presorted[a][start:end]
+        _, lo, hi = threshold_gains(X[part, a], y[part], [end - start], n_classes,
+                                    None if w is None else w[part], score)
+        return lo[0], hi[0]
+
+    def split(start, end, attrs, path):
+        rows = index[start:end]
+        labels = y[rows]
+        counts = weighted_count(labels, None if w is None else w[rows], n_classes)
+        if np.count_nonzero(counts) == 1:
+            return classes[labels[0]], None, None, counts
+        default = classes[majority(labels, counts)]
+        if not attrs:
+            return default, None, None, counts
+
+        attrs, rng = candidates(attrs, path, end - start)
+        best = None if rng is None else sampled_best(rows, attrs, counts, rng)
+        if best is not None:
+            cut = exact_cut(start, end, best) if best in numeric else None
+        else:
+            scores, cuts = node_scores(rows, {a: presorted[a][start:end] for a in attrs if a in numeric}, attrs, w)
+            if not np.isfinite(scores.max()):
+                return default, None, None, counts
+            best = attrs[best_attribute(scores)]
+            cut = cuts.get(best)
+        codes = X[rows, best]
+        if cut is not None:
+            codes = (codes > cut[0]).astype(np.int32)
+        if presorted:
+            follow(slice(start, end), rows, codes)
+        child_counts, bounds = partition(index, start, end, codes, 2 if cut is not None else n_values[best])
+        return make_node(best, cut, default), best, children(best, child_counts, bounds), counts
+
+    def split_level(items):
+        m = len(items)
+        starts = np.array([it[2] for it in items], dtype=np.intp)
+        sizes = np.array([it[3] - it[2] for it in items], dtype=np.intp)
+        positions = np.arange(sizes.sum()) + np.repeat(starts - (np.cumsum(sizes) - sizes), sizes)
+        nid = np.repeat(np.arange(m), sizes)
+        rows = index[positions]
+        labels = y[rows]
+
+        counts = weighted_count(nid * n_classes + labels, None if w is None else w[rows],
+                                m * n_classes).reshape(m, n_classes)
+        # majority: first row of each node whose class count is the node maximum
+        hit = np.flatnonzero(counts[nid, labels] == counts.max(axis=1)[nid])
+        hit = hit[np.concatenate(([True], nid[hit][1:] != nid[hit][:-1]))]
+        defaults = labels[hit]
+        grow = (np.count_nonzero(counts, axis=1) > 1) & np.array([bool(it[4]) for it in items])
+
+        results = [(classes[c], None, None, counts[i]) for i, c in enumerate(defaults)]
+        if not grow.any():
+            return results
+
+        # score and partition only the nodes that are split
+        g = np.flatnonzero(grow)
+        keep = grow[nid]
+        rows, labels, positions = rows[keep], labels[keep], positions[keep]
+        nid = (np.cumsum(grow) - 1)[nid[keep]]
+        sizes = sizes[g]
+        weights = None if w is None else w[rows]
+
+        allowed = np.zeros((len(g), X.shape[1]), dtype=bool)
+        level = np.full((len(g), X.shape[1]), -np.inf)
+        cut_lo = np.full((len(g), X.shape[1]), -1, dtype=np.intp)
+        cut_hi = np.full((len(g), X.shape[1]), -1, dtype=np.intp)
+        exact = np.ones(len(g), dtype=bool)
+        for j, i in enumerate(g):
+            _, _, start, end, attrs, path = items[i]
+            attrs, rng = candidates(attrs, path, end - start)
+            b = None if rng is None else sampled_best(index[start:end], attrs, counts[i], rng)
+            if b is None:
+                allowed[j, attrs] = True
+                continue
+            # settled on the sample: b is the node's only (finite) choice
+            exact[j] = False
+            allowed[j, b] = True
+            level[j, b] = 0.0
+            if b in numeric:
+                cut_lo[j, b], cut_hi[j, b] = exact_cut(start, end, b)
+
+        # score the other nodes in batches, on the attributes any of them may use
+        e = np.flatnonzero(exact)
+        if len(e):
+            keep = exact[nid]
+            e_rows, e_labels, e_positions = rows[keep], labels[keep], positions[keep]
+            e_nid = (np.cumsum(exact) - 1)[nid[keep]]
+            e_weights = None if weights is None else weights[keep]
+            used = allowed[e].any(axis=0)
+            nom = nominal[used[nominal]]
+            if len(nom):
+                level[np.ix_(e, nom)] = map_attributes(
+                    lambda attrs: level_gains(X, e_rows, e_labels, e_nid, sizes[e], n_values, n_classes, attrs,
+                                              counts[g[e]], e_weights, score),
+                    nom, pool, n_jobs, len(e_rows) * len(nom))
+            num = [a for a in presorted if used[a]]
+            if num:
+                parts = [presorted[a][e_positions] for a in num]
+                codes = np.concatenate([X[part, a] for a, part in zip(num, parts)])
+                part_rows = np.concatenate(parts)
+                gain, lo, hi = threshold_gains(codes, y[part_rows], np.tile(sizes[e], len(num)), n_classes,
+                                               None if w is None else w[part_rows], score)
+                level[np.ix_(e, num)] = gain.reshape(len(num), -1).T
+                cut_lo[np.ix_(e, num)] = lo.reshape(len(num), -1).T
+                cut_hi[np.ix_(e, num)] = hi.reshape(len(num), -1).T
+        scores = np.where(allowed, level, -np.inf)
+        top = scores.max(axis=1)
+        best = np.argmax(scores >= top[:, None] - TIE_TOL, axis=1)
+
+        codes = X[rows, best[nid]]
+        if presorted:
+            lo = cut_lo[np.arange(len(g)), best]
+            is_cut = np.isin(best, list(numeric))
+            codes = np.where(is_cut[nid], codes > lo[nid], codes)
+        keys = nid * width + codes
+        if presorted:
+            follow(positions, rows, keys)
+        index[positions] = rows[np.argsort(keys, kind="stable")]
+        child_counts = np.bincount(keys, minlength=len(g) * width).reshape(len(g), width)
+        bounds = starts[g][:, None] + np.concatenate((np.zeros((len(g), 1), dtype=np.intp), np.cumsum(child_counts, axis=1)), axis=1)
+
+        for j, i in enumerate(g):
+            # only constant numeric attributes left: stays a leaf
+            if not np.isfinite(top[j]):
+                continue
+            b = best[j]
+            cut = (cut_lo[j, b], cut_hi[j, b])
+            results[i] = (make_node(b, cut, results[i][0]), b, children(b, child_counts[j], bounds[j]), counts[i])
+        return results
+
+    # work item: (children dict to fill, key, start, end, remaining attrs, path)
+    root = {}
+    work = deque([(root, None, 0, len(index), attrs, tuple(path))])
+    pending = []
+    try:
+        while work:
+            if order == "depth":
+                items = [work.pop()]
+                results = [split(*items[0][2:])]
+            else:
+                items = list(work)
+                work.clear()
+                results = split_level(items)
+
+            for (parent, key, _, _, item_attrs, path), (node, best, bounds, counts) in zip(items, results):
+                parent[key] = node
+                if bounds is None:
+                    if leaf_counts is not None:
+                        leaf_counts.add(parent, key, counts)
+                    continue
+                # a numeric attribute can be cut again further down
+                remaining = item_attrs if best in numeric else [a for a in item_attrs if a != best]
+                child_items = []
+                for c, (key, lo, hi) in enumerate(bounds):
+                    # placeholder keeps the children in value order
+                    node["children"][key] = None
+                    future = offload(index[lo:hi].copy(), remaining, path + (c,)) if offload else None
+                    if future is None:
+                        child_items.append((node["children"], key, lo, hi, remaining, path + (c,)))
+                    else:
+                        pending.append((node["children"], key, future))
+                # the stack pops the last item first; expand the children in value order
+                work.extend(reversed(child_items) if order == "depth" else child_items)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    for parent, key, future in pending:
+        if leaf_counts is None:
+            parent[key] = future.result()
+        else:
+            parent[key], counts = future.result()
+            leaf_counts.add_tree(parent[key], counts, parent, key)
+    return root[None]
+
+
+# subtrees smaller than this are built locally, shipping them costs more than it saves
+PARALLEL_MIN_ROWS = 20_000
+
+_worker = {}
+
+
+def _init_worker(X, y, attributes, categories, classes, order, numeric, with_counts, sample_weight, criterion,
+                 max_features, sample_rows, delta, seed):
+    _worker.update(X=X, y=y, attributes=attributes, categories=categories, classes=classes, order=order,
+                   numeric=numeric, with_counts=with_counts, sample_weight=sample_weight, criterion=criterion,
+                   max_features=max_features, sample_rows=sample_rows, delta=delta, seed=seed)
+
+
+def _build_subtree(rows, attrs, path):
+    w = _worker
+    leaf_counts = LeafCounts() if w["with_counts"] else None
+    tree = build(w["X"], w["y"], w["attributes"], w["categories"], w["classes"], rows, attrs, w["order"],
+                 numeric=w["numeric"], leaf_counts=leaf_counts, sample_weight=w["sample_weight"],
+                 criterion=w["criterion"], max_features=w["max_features"], sample_rows=w["sample_rows"],
+                 delta=w["delta"], random_state=w["seed"], path=path)
+    return tree if leaf_counts is None else (tree, leaf_counts.gather(tree))
+
+
+def build_parallel(X, y, attributes, categories, classes, rows, attrs, order="depth", n_jobs=2,
+                   min_rows=PARALLEL_MIN_ROWS, numeric=(), leaf_counts=None, sample_weight=None, criterion="entropy",
+                   max_features=None, sample_rows=None, delta=1e-7, random_state=None):
+    """
+    build() with child subtrees farmed out to a pool of n_jobs processes.
+
+    The top of the tree is grown locally until a subtree holds at most
+    1/n_jobs of the rows; such subtrees with at least min_rows rows go to
+    the pool and smaller ones stay local. Workers receive only row indices:
+    with the fork start method the encoded arrays are inherited, not pickled.
+    Meanwhile the main process scores its own large nodes on n_jobs threads.
+    Every subtree depends only on its rows, attributes and path (random
+    draws), so the tree is identical to the serial build.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    limit = max(min_rows, len(rows) // n_jobs)
+    # one seed for all processes, also when random_state is None
+    seed = as_seed(random_state)
+
+    with ProcessPoolExecutor(n_jobs, mp_context=context, initializer=_init_worker,
+                             initargs=(X, y, attributes, categories, classes, order, numeric,
+                                       leaf_counts is not None, sample_weight, criterion, max_features,
+                                       sample_rows, delta, seed)) as pool:
+        # start the workers before build() starts its threads; forking a threaded process is unsafe
+        pool.submit(int).result()
+
+        def offload(rows, attrs, path):
+            if min_rows <= len(rows) <= limit:
+                return pool.submit(_build_subtree, rows, attrs, path)
+            return None
+
+        return build(X, y, attributes, categories, classes, rows, attrs, order, offload, n_jobs, numeric, leaf_counts,
+                     sample_weight, criterion, max_features, sample_rows, delta, seed)
+
+
+def id3_columnar(dataset, attributes, label_key, order="depth", n_jobs=1, numeric=None, leaf_counts=None,
+                 sample_weight=None, dedupe_rows=True, criterion="entropy", max_features=None, sample_rows=None,
+                 delta=1e-7, random_state=None):
+    """
+    Front end for list[dict] data: encode once, then build on the arrays.
+    `numeric` names the attributes split by threshold instead of by value.
+    """
+    if not dataset:
+        return None
+    X, y, categories, classes = encode(dataset, attributes, label_key)
+    return id3_encoded(X, y, categories, classes, attributes, order, n_jobs, numeric, leaf_counts, sample_weight,
+                       dedupe_rows, criterion, max_features, sample_rows, delta, random_state)
+
+
+def id3_encoded(X, y, categories, classes, attributes, order="depth", n_jobs=1, numeric=None, leaf_counts=None,
+                sample_weight=None, dedupe_rows=True, criterion="entropy", max_features=None, sample_rows=None,
+                delta=1e-7, random_state=None):
+    """
+    Build on data that is already encoded, by encode() or tabular.encode_table().
+    Rows with sample_weight 0 are left out. dedupe_rows builds on the
+    distinct rows weighted by their counts (see dedupe()), same tree unless
+    rows are sampled. max_features, sample_rows, delta and random_state are
+    passed to build().
+    """
+    sample_weight = check_weights(sample_weight, len(y))
+    y, classes = positive_classes(y, classes, sample_weight)
+    if leaf_counts is not None:
+        leaf_counts.classes = list(classes)
+    if dedupe_rows:
+        X, y, sample_weight = dedupe(X, y, sample_weight)
+    rows = np.arange(len(y)) if sample_weight is None else np.flatnonzero(sample_weight)
+    if not len(rows):
+        return None
+    numeric = numeric_indices(attributes, categories, numeric)
+    attrs = list(range(len(attributes)))
+    if n_jobs > 1:
+        return build_parallel(X, y, attributes, categories, classes, rows, attrs, order, n_jobs, numeric=numeric,
+                              leaf_counts=leaf_counts, sample_weight=sample_weight, criterion=criterion,
+                              max_features=max_features, sample_rows=sample_rows, delta=delta,
+                              random_state=random_state)
+    return build(X, y, attributes, categories, classes, rows, attrs, order, numeric=numeric,
+                 leaf_counts=leaf_counts, sample_weight=sample_weight, criterion=criterion,
+                 max_features=max_features, sample_rows=sample_rows, delta=delta, random_state=random_state)
+
+
+def check_weights(sample_weight, n):
+    """
+    sample_weight as a 1-D array of n finite, non-negative weights (integer
+    weights stay integer), or None.
+    """
+    if sample_weight is None:
+        return None
+    w = np.asarray(sample_weight)
+    if w.dtype.kind == "b" or w.dtype.kind not in "iuf":
+        w = w.astype(np.float64)
+    if w.shape != (n,):
+        raise ValueError(f"sample_weight must have one weight per row ({n}), got shape {w.shape}.")
+    if w.dtype.kind == "f" and not np.isfinite(w).all():
+        raise ValueError("sample_weight must be finite.")
+    if (w < 0).any():
+        raise ValueError("sample_weight must not be negative.")
+    return w
+
+
+# collapse the rows only if a pattern repeats at least this often on average
+DEDUPE_MIN_RATIO = 2
+
+
+def unique_patterns(X, y, rows):
+    """
+    Group the rows `rows` by their (attribute codes, label) pattern, in one
+    hashing pass per column instead of a lexicographic sort.
+
+    Returns:
+        tuple: (first, pattern) - first[p] is the first row of pattern p,
+               patterns are numbered in order of first occurrence and
+               pattern[i] is the pattern of rows[i]
+    """
+    key = y[rows].astype(np.int64)
+    bound = int(key.max()) + 1
+    for j in range(X.shape[1]):
+        codes = X[rows, j].astype(np.int64)
+        radix = int(codes.max()) + 1
+        if bound * radix >= 1 << 63:
+            # renumber the distinct keys 0..k-1 before they overflow
+            key, uniques = pd.factorize(key)
+            bound = len(uniques)
+        key = key * radix + codes
+        bound *= radix
+    pattern, _ = pd.factorize(key)
+    # a new pattern number first appears where the running maximum grows
+    seen = np.maximum.accumulate(pattern)
+    first = np.flatnonzero(np.concatenate(([True], seen[1:] > seen[:-1])))
+    return rows[first], pattern
+
+
+def positive_classes(y, classes, w):
+    """
+    Classes of the rows with positive weight, in order of first appearance
+    among them, with y recoded to match: a class seen only in rows of weight
+    0 is not a class of the model, as in id3.id3_weighted(), which drops
+    those rows first. Rows of a dropped class get code 0; their weight is 0,
+    so no builder counts them.
+
+    Returns:
+        tuple: (y, classes), the inputs when no weight is 0
+    """
+    if w is None or w.all():
+        return y, classes
+    codes, first = np.unique(y[w > 0], return_index=True)
+    kept = codes[np.argsort(first)]
+    recode = np.zeros(len(classes), dtype=y.dtype)
+    recode[kept] = np.arange(len(kept))
+    return recode[y], [classes[c] for c in kept]
+
+
+def dedupe(X, y, sample_weight=None):
+    """
+    Collapse identical encoded rows into one weighted row per pattern.
+
+    Steps:
+        rows     - rows of weight 0 are dropped
+        patterns - unique_patterns(), kept in order of first occurrence
+        weights  - rows per pattern (or summed sample_weight); integer
+                   counts stay integer
+
+    build() only looks at counts, and its partitions are stable, so ties
+    (majority: the class seen first) resolve on the first occurrence of
+    each pattern just as on the full data: the tree and its leaf counts
+    are the same. Left as is when there are fewer than DEDUPE_MIN_RATIO
+    rows per pattern.
+
+    Returns:
+        tuple: (X, y, sample_weight) - the patterns, or the inputs with
+               sample_weight checked
+    """
+    w = check_weights(sample_weight, len(y))
+    rows = np.arange(len(y)) if w is None else np.flatnonzero(w)
+    if not len(rows):
+        return X, y, w
+    first, pattern = unique_patterns(X, y, rows)
+    if len(rows) < DEDUPE_MIN_RATIO * len(first):
+        return X, y, w
+    weights = weighted_count(pattern, None if w is None else w[rows], len(first))
+    return np.asfortranarray(X[first]), y[first], weights
+
+
+def numeric_indices(attributes, categories, numeric):
+    # attribute indices of the `numeric` names; their sorted values must be real numbers
+    numeric = list(numeric or ())
+    unknown = [a for a in numeric if a not in attributes]
+    if unknown:
+        raise ValueError(f"Numeric attributes {unknown} are not in attributes.")
+    idx = [attributes.index(a) for a in numeric]
+    for j in idx:
+        if any(v != v for v in categories[j]):
+            raise ValueError(f"Numeric attribute {attributes[j]!r} has missing (NaN) values.")
+    return idx
@@ -13,17 +13,16 @@ def main():
     Xtr_disc = transform_with_bins(X_train, edges)
     Xte_disc = transform_with_bins(X_test, edges)
 
-    # 3) ID3 expects list[dict]
-    train_dicts = [row.to_dict() for _, row in Xtr_disc.iterrows()]
-    test_dicts  = [row.to_dict() for _, row in Xte_disc.iterrows()]
-    dataset = [{**d, "__label__": y} for d, y in zip(train_dicts, y_train)]
-    attrs = list(Xtr_disc.columns)
-
-    # 4) Train & eval ID3
-    id3 = ID3().fit(dataset, attrs, "__label__")
-    y_pred_id3 = id3.predict(test_dicts)
+    # 3) Train & eval ID3 straight on the DataFrames
+    id3 = ID3().fit(Xtr_disc, y=y_train)
+    y_pred_id3 = id3.predict(Xte_disc)
     print("ID3 (discretized) accuracy:", accuracy_score(y_test, y_pred_id3))
 
+    # 4) ID3 on raw features with threshold splits, no discretization
+    id3_raw = ID3().fit(X_train, y=y_train, numeric=list(X_train.columns))
+    y_pred_id3_raw = id3_raw.predict(X_test)
+    print("ID3 (numeric thresholds) accuracy:", accuracy_score(y_test, y_pred_id3_raw))
+
     # 5) Sklearn tree on same discretized features (fair apples-to-apples)
     dt_disc = DecisionTreeClassifier(criterion="entropy", random_state=42)
     dt_disc.fit(Xtr_disc.values, y_train)
@@ -0,0 +1,400 @@
+#compiled tree
+#
+# id3.walk() follows one sample at a time through nested dicts. compile_tree()
+# lowers a fitted tree into flat NumPy arrays once, so a whole batch of
+# integer-encoded rows moves down one level per vectorized step.
+
+import numpy as np
+import pandas as pd
+from collections import Counter
+from tabular import label_array
+from entropy import weighted_counts
+
+
+class CompiledTree:
+    """
+    Flat-array form of a nested dict tree.
+
+    Internal nodes are 0..n_nodes-1; node n_nodes + c is the leaf of class c.
+        feature[i]    - column of the code matrix tested at node i, -1 for leaves
+        threshold[i]  - threshold nodes: rank of the threshold among the column's
+                        thresholds, -1 for value nodes
+        offset[i]     - node i's child lookup table starts at lut[offset[i]];
+                        value nodes have one entry per code of the column,
+                        threshold nodes two (<= threshold, > threshold)
+        default[i]    - child taken for an unseen value (code -1)
+        leaf_class[j] - class index of every node, -1 for internal ones
+        counts        - optional (n_nodes, n_classes) training class counts of the
+                        leaves, the source of predict_proba(); without them a
+                        leaf's probability is 1 for its label
+
+    Columns are encoded by encode(): value columns map each value to its index
+    in values[j] (-1 if unseen), threshold columns to the number of thresholds
+    below the value, so v <= thresholds[k] exactly when its code is <= k.
+    """
+
+    def __init__(self, attributes, values, numeric, classes, feature, threshold, offset, default, lut, root,
+                 leaf_class=None, columns=None, counts=None):
+        self.attributes = attributes
+        # every attribute of the model, tested or not (column names of its inputs)
+        self.columns = list(attributes) if columns is None else columns
+        self.values = values
+        self.numeric = numeric
+        self.classes = classes
+        self.feature = feature
+        self.threshold = threshold
+        self.offset = offset
+        self.default = default
+        self.lut = lut
+        self.root = root
+        if leaf_class is None:
+            leaf_class = np.concatenate((np.full(len(feature) - len(classes), -1), np.arange(len(classes))))
+        self.leaf_class = leaf_class
+        self.counts = counts
+        self.labels = label_array(classes)
+        self._index = [None if num else {v: i for i, v in enumerate(vals)} for vals, num in zip(values, numeric)]
+
+    def to_tree(self):
+        """
+        Nested dict tree with the same predictions. A value child that leads to
+        the node's default label looks like an unseen value here and is left out.
+        """
+        if self.root < 0:
+            return None
+        if self.feature[self.root] < 0:
+            return self.classes[self.leaf_class[self.root]]
+
+        root = {}
+        stack = [(self.root, root)]
+        while stack:
+            i, node = stack.pop()
+            j, default = self.feature[i], self.default[i]
+            node["attr"] = self.attributes[j]
+            if self.numeric[j]:
+                node["threshold"] = float(self.values[j][self.threshold[i]])
+                keys = [True, False]
+            else:
+                keys = self.values[j]
+            node["children"] = {}
+            node["default"] = self.classes[self.leaf_class[default]]
+            for key, t in zip(keys, self.lut[self.offset[i]:self.offset[i] + len(keys)]):
+                if t == default and not self.numeric[j]:
+                    continue
+                if self.feature[t] < 0:
+                    node["children"][key] = self.classes[self.leaf_class[t]]
+                else:
+                    node["children"][key] = {}
+                    stack.append((t, node["children"][key]))
+        return root
+
+    def encode(self, samples):
+        """
+        (n, n_attributes) int64 code matrix of an iterable of row dicts.
+        Missing attributes get code -1, like an unseen value.
+        """
+        samples = list(samples)
+        codes = np.empty((len(samples), len(self.attributes)), dtype=np.int64)
+        for j, a in enumerate(self.attributes):
+            column = [row.get(a) for row in samples]
+            if self.numeric[j]:
+                missing = np.fromiter((v is None for v in column), dtype=bool, count=len(column))
+                x = np.array([np.nan if v is None else v for v in column], dtype=np.float64)
+                # NaN sorts last: "NaN <= t" is False, the walker goes right as well
+                codes[:, j] = np.where(missing, -1, np.searchsorted(self.values[j], x, side="left"))
+            else:
+                index = self._index[j]
+                codes[:, j] = np.fromiter((index.get(v, -1) for v in column), dtype=np.int64, count=len(column))
+        return codes
+
+    def encode_table(self, table, n):
+        """
+        encode() for column data: table maps attribute names to n-row arrays,
+        Series or categorical Series, coded without a Python object per row.
+        """
+        codes = np.empty((n, len(self.attributes)), dtype=np.int64)
+        for j, a in enumerate(self.attributes):
+            if a not in table:
+                codes[:, j] = -1
+                continue
+            column = table[a]
+            cat = getattr(column, "cat", None) if isinstance(column, pd.Series) else None
+            if self.numeric[j]:
+                if cat is not None:
+                    column = column.astype(np.float64)
+                x = np.asarray(column)
+                missing = np.equal(x, None) if x.dtype == object else np.zeros(n, dtype=bool)
+                x = np.where(missing, np.nan, x).astype(np.float64)
+                codes[:, j] = np.where(missing, -1, np.searchsorted(self.values[j], x, side="left"))
+            elif cat is not None:
+                # categories -> codes once, then a lookup per row; NaN (code -1) stays unseen
+                lut = np.append(pd.Index(self.values[j]).get_indexer(cat.categories), -1)
+                codes[:, j] = lut[cat.codes.to_numpy()]
+            else:
+                codes[:, j] = pd.Index(self.values[j]).get_indexer(np.asarray(column))
+        return codes
+
+    def apply(self, codes):
+        """
+        Leaf node reached by every row of an encoded matrix.
+
+        Steps:
+            node    - every row starts at the root
+            active  - rows still at an internal node
+            step    - look up each active row's child from its node's table,
+                      or take the node's default child for code -1
+        """
+        codes = np.asarray(codes)
+        node = np.full(len(codes), self.root, dtype=np.intp)
+        active = np.flatnonzero(self.feature[node] >= 0)
+        while active.size:
+            cur = node[active]
+            code = codes[active, self.feature[cur]]
+            thr = self.threshold[cur]
+            slot = np.where(thr >= 0, code > thr, np.maximum(code, 0))
+            node[active] = np.where(code < 0, self.default[cur], self.lut[self.offset[cur] + slot])
+            active = active[self.feature[node[active]] >= 0]
+        return node
+
+    def predict_codes(self, codes):
+        """
+        Class index of every row of an encoded matrix.
+        """
+        return self.leaf_class[self.apply(codes)]
+
+    def proba_codes(self, codes):
+        """
+        (n, n_classes) class probabilities of every row of an encoded matrix.
+        """
+        # only the reached rows are gathered and normalized, so a memory-mapped
+        # counts array is never copied as a whole
+        leaf = self.apply(codes)
+        if self.counts is None:
+            cls = self.leaf_class[leaf]
+            proba = np.zeros((len(leaf), len(self.classes)))
+            hit = np.flatnonzero(cls >= 0)
+            proba[hit, cls[hit]] = 1.0
+            return proba
+        c = self.counts[leaf]
+        return c / np.maximum(c.sum(axis=1, keepdims=True), 1)
+
+    def predict(self, samples):
+        """
+        Labels of an iterable of row dicts as an array; equals id3.walk() per sample.
+        """
+        samples = list(samples)
+        if self.root < 0:
+            return np.full(len(samples), None, dtype=object)
+        return self.labels[self.predict_codes(self.encode(samples))]
+
+    def predict_table(self, table, n):
+        """
+        Labels of n rows given as columns (see encode_table), as an array.
+        """
+        if self.root < 0:
+            return np.full(n, None, dtype=object)
+        return self.labels[self.predict_codes(self.encode_table(table, n))]
+
+    def predict_proba(self, samples):
+        """
+        Class probabilities of an iterable of row dicts, (n, n_classes) with
+        columns in `classes` order. A row that takes a default child gets the
+        class distribution of that node.
+        """
+        samples = list(samples)
+        if self.root < 0:
+            return np.zeros((len(samples), 0))
+        return self.proba_codes(self.encode(samples))
+
+    def predict_proba_table(self, table, n):
+        """
+        predict_proba() of n rows given as columns (see encode_table).
+        """
+        if self.root < 0:
+            return np.zeros((n, 0))
+        return self.proba_codes(self.encode_table(table, n))
+
+
+def leaf_slots(tree):
+    """
+    (children dict, key) of every leaf of a nested dict tree, in the
+    breadth-first order compile_tree() numbers them.
+    """
+    queue = [tree] if isinstance(tree, dict) else []
+    for node in queue:
+        for key, child in node["children"].items():
+            if isinstance(child, dict):
+                queue.append(child)
+            else:
+                yield node["children"], key
+
+
+class LeafCounts:
+    """
+    Class counts of the leaves of a tree, recorded by a builder as it places
+    each leaf at parent[key]. A single-leaf tree records exactly one leaf.
+    Count columns follow `classes`, which the builder sets.
+    """
+
+    def __init__(self):
+        self.classes = None
+        self._counts = {}
+
+    def add(self, parent, key, counts):
+        self._counts[id(parent), key] = counts
+
+    def add_labels(self, parent, key, labels, sample_weight=None):
+        # counts of a leaf from its row labels (dict engine), or summed weights
+        if sample_weight is None:
+            seen = Counter(labels)
+            self.add(parent, key, np.array([seen[c] for c in self.classes], dtype=np.int64))
+            return
+        seen = weighted_counts(labels, sample_weight)
+        self.add(parent, key, np.array([seen.get(c, 0) for c in self.classes]))
+
+    def add_tree(self, tree, counts, parent, key):
+        # counts of a subtree placed at parent[key], in gather() order
+        if not isinstance(tree, dict):
+            self.add(parent, key, counts[0])
+            return
+        for (children, k), c in zip(leaf_slots(tree), counts):
+            self.add(children, k, c)
+
+    def gather(self, tree):
+        """
+        (n_leaves, n_classes) counts in leaf_slots(tree) order: int64, or
+        float64 when the builder summed fractional sample weights.
+        """
+        K = len(self.classes or ())
+        if tree is None:
+            return np.zeros((0, K), dtype=np.int64)
+        if not isinstance(tree, dict):
+            rows = list(self._counts.values())
+        else:
+            rows = [self._counts[id(children), key] for children, key in leaf_slots(tree)]
+        rows = np.array(rows).reshape(-1, K)
+        return rows if rows.dtype.kind == "f" else rows.astype(np.int64)
+
+
+def compile_tree(tree, attributes=None, leaf_counts=None, classes=None):
+    """
+    Lower a nested dict tree (id3.id3() format, threshold nodes included)
+    into a CompiledTree. `attributes` fixes the column order of the code
+    matrix; by default the tested attributes in order of first use.
+
+    With leaf_counts (LeafCounts.gather() rows, columns in `classes` order)
+    every leaf gets its own node with its counts, and every internal node a
+    default leaf with the counts of all its rows, so predict_proba() returns
+    the training distribution wherever a row ends. Without them the leaves of
+    one class share a node.
+    """
+    if tree is None:
+        return CompiledTree([], [], [], [], np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp),
+                            np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp),
+                            np.empty(0, dtype=np.intp), -1, columns=attributes)
+
+    # pass 1: internal nodes in breadth-first order, classes, values per attribute
+    nodes, values, kinds = [], {}, {}
+    classes = {} if classes is None else {c: i for i, c in enumerate(classes)}
+    queue = [tree]
+    for node in queue:
+        if not isinstance(node, dict):
+            classes.setdefault(node, len(classes))
+            continue
+        nodes.append(node)
+        a = node["attr"]
+        kind = "threshold" in node
+        if kinds.setdefault(a, kind) != kind:
+            raise ValueError(f"Attribute {a!r} is used both with and without a threshold.")
+        seen = values.setdefault(a, {})
+        if kind:
+            seen.setdefault(node["threshold"], None)
+        else:
+            for v in node["children"]:
+                seen.setdefault(v, None)
+        classes.setdefault(node["default"], len(classes))
+        queue.extend(node["children"].values())
+
+    used = list(values)
+    if attributes is not None:
+        missing = [a for a in used if a not in attributes]
+        if missing:
+            raise ValueError(f"Tree tests attributes {missing} that are not in attributes.")
+        used = [a for a in attributes if a in values]
+        attributes = list(attributes)
+    column = {a: j for j, a in enumerate(used)}
+    numeric = [kinds[a] for a in used]
+    # value columns keep the tree's key order; threshold columns sort their thresholds
+    values = [np.array(sorted(values[a]), dtype=np.float64) if kinds[a] else list(values[a]) for a in used]
+    value_index = [None if num else {v: i for i, v in enumerate(vals)} for vals, num in zip(values, numeric)]
+
+    # pass 2: flat arrays
+    m, K = len(nodes), len(classes)
+    ids = {id(node): i for i, node in enumerate(nodes)}
+    if leaf_counts is None:
+        # leaf of class c: m + c
+        n_nodes = m + K
+        leaf_class = np.concatenate((np.full(m, -1), np.arange(K)))
+    else:
+        # leaf l (leaf_slots order): m + l, default leaf of node i: m + L + i
+        L = len(leaf_counts)
+        n_nodes = m + L + m
+        leaf_class = np.full(n_nodes, -1, dtype=np.intp)
+        counts = np.zeros((n_nodes, K), dtype=leaf_counts.dtype)
+        counts[m:m + L] = leaf_counts
+        parent = np.full(n_nodes, -1, dtype=np.intp)
+    leaves = iter(range(m, n_nodes))
+
+    def target(child, i):
+        if leaf_counts is None:
+            return ids[id(child)] if isinstance(child, dict) else m + classes[child]
+        if isinstance(child, dict):
+            t = ids[id(child)]
+        else:
+            t = next(leaves)
+            leaf_class[t] = classes[child]
+        parent[t] = i
+        return t
+
+    feature = np.full(n_nodes, -1, dtype=np.intp)
+    threshold = np.full(n_nodes, -1, dtype=np.intp)
+    offset = np.zeros(n_nodes, dtype=np.intp)
+    default = np.full(n_nodes, -1, dtype=np.intp)
+    lut = []
+    for i, node in enumerate(nodes):
+        j = column[node["attr"]]
+        feature[i] = j
+        offset[i] = len(lut)
+        if leaf_counts is None:
+            default[i] = m + classes[node["default"]]
+        else:
+            default[i] = m + L + i
+            leaf_class[default[i]] = classes[node["default"]]
+        children = node["children"]
+        if numeric[j]:
+            threshold[i] = int(np.searchsorted(values[j], node["threshold"]))
+            table = [default[i], default[i]]
+            for side, child in children.items():
+                table[0 if side else 1] = target(child, i)
+        else:
+            table = [default[i]] * len(values[j])
+            for v, child in children.items():
+                table[value_index[j][v]] = target(child, i)
+        lut.extend(table)
+
+    if leaf_counts is None:
+        root = ids[id(tree)] if m else m + classes[tree]
+        return CompiledTree(used, values, numeric, list(classes), feature, threshold, offset, default,
+                            np.array(lut, dtype=np.intp), root, leaf_class, attributes)
+
+    if m:
+        root = 0
+        # node totals, children before parents: leaves, then internal nodes bottom-up
+        np.add.at(counts, parent[m:m + L], leaf_counts)
+        for i in range(m - 1, 0, -1):
+            counts[parent[i]] += counts[i]
+        counts[m + L:] = counts[:m]
+    else:
+        root = next(leaves)
+        leaf_class[root] = classes[tree]
+    return CompiledTree(used, values, numeric, list(classes), feature, threshold, offset, default,
+                        np.array(lut, dtype=np.intp), root, leaf_class, attributes, counts)
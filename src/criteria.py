@@ -0,0 +1,109 @@
+#split criteria
+#
+# A criterion scores candidate splits from count tables that are already
+# built, every attribute of a node (or of a whole tree level) in one call.
+# All criteria share one signature:
+#
+#   score(table, starts, counts) -> scores
+#
+#   table   (..., Σ n_values, n_classes) value × class counts, one block of
+#           rows per attribute starting at starts[i] (columnar.contingency()
+#           layout); leading axes are nodes
+#   starts  first table row of every block
+#   counts  (..., n_classes) class counts of the node(s)
+#   scores  (..., n_blocks), higher is better
+#
+# The engines pick the first block within TIE_TOL of the best score. A binary
+# cut is a block of two rows (left, right). Counts may be weighted (float).
+
+import numpy as np
+from math import log, log2, sqrt
+from entropy import xlogx
+
+
+def entropy_gain(table, starts, counts):
+    """
+    Information gain H(S) - H(S|A) of every block, in bits.
+    """
+    N = counts.sum(axis=-1)
+    ## N · H(S) = N·log2(N) - Σ_c n_c·log2(n_c)
+    H_S_n = xlogx(N) - xlogx(counts).sum(axis=-1)
+    ## N · H(S|A) = Σ_v n_v·log2(n_v) - Σ_v Σ_c n_vc·log2(n_vc)
+    H_S_A_n = (np.add.reduceat(xlogx(table.sum(axis=-1)), starts, axis=-1)
+               - np.add.reduceat(xlogx(table).sum(axis=-1), starts, axis=-1))
+    N = np.expand_dims(N, -1)
+    return (np.expand_dims(H_S_n, -1) - H_S_A_n) / N
+
+
+def gain_ratio(table, starts, counts):
+    """
+    C4.5 gain ratio: information gain / split information H(A). A block
+    with a single non-empty value does not split and scores 0.
+    """
+    gain = entropy_gain(table, starts, counts)
+    n_v = table.sum(axis=-1)
+    N = np.expand_dims(counts.sum(axis=-1), -1)
+    ## N · H(A) = N·log2(N) - Σ_v n_v·log2(n_v)
+    split_n = xlogx(N) - np.add.reduceat(xlogx(n_v), starts, axis=-1)
+    # tested by count, as weighted n_v may not sum back to exactly N
+    splits = np.add.reduceat((n_v > 0).astype(np.intp), starts, axis=-1) > 1
+    return np.divide(gain * N, split_n, out=np.zeros(gain.shape), where=splits)
+
+
+def gini_gain(table, starts, counts):
+    """
+    Decrease of Gini impurity G(S) - Σ_v |S_v|/|S| · G(S_v), no logarithms.
+    """
+    n_v = table.sum(axis=-1)
+    N = np.expand_dims(counts.sum(axis=-1), -1)
+    ## N · (G(S) - G(S|A)) = Σ_v Σ_c n_vc² / n_v - Σ_c n_c² / N
+    within = np.divide(sum_squares(table), n_v, out=np.zeros(n_v.shape), where=n_v > 0)
+    return (np.add.reduceat(within, starts, axis=-1) - np.expand_dims(sum_squares(counts), -1) / N) / N
+
+
+def sum_squares(counts):
+    # Σ_c n_c² over the last axis in float64, which cannot overflow
+    return np.einsum("...k,...k->...", counts, counts, dtype=np.float64, casting="unsafe")
+
+
+CRITERIA = {"entropy": entropy_gain, "gain_ratio": gain_ratio, "gini": gini_gain}
+
+
+def get_criterion(criterion):
+    """
+    Scoring function of a criterion name in CRITERIA; a callable with the
+    same signature is returned as is.
+    """
+    if callable(criterion):
+        return criterion
+    if criterion not in CRITERIA:
+        raise ValueError(f"Unknown criterion {criterion!r}, expected one of {tuple(CRITERIA)} or a callable.")
+    return CRITERIA[criterion]
+
+
+def cut_scores(score, left, total):
+    """
+    score() of binary cuts: left holds the class counts left of each cut and
+    total those of its node, both (n_cuts, n_classes).
+    """
+    return score(np.stack((left, total - left), axis=1), np.array([0]), total)[:, 0]
+
+
+def score_range(score, n_classes):
+    """
+    Largest score a built-in criterion can give with n_classes classes, the
+    R of hoeffding_bound(); None for other functions.
+    """
+    if score is entropy_gain:
+        return log2(n_classes) if n_classes > 1 else 0.0
+    if score is gain_ratio:
+        # IG <= H(A)
+        return 1.0
+    if score is gini_gain:
+        return 1.0 - 1.0 / n_classes
+    return None
+
+
+def hoeffding_bound(R, delta, n):
+    ## ε = sqrt( R² · ln(1/δ) / (2n) )
+    return sqrt(R * R * log(1 / delta) / (2 * n))
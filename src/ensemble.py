@@ -0,0 +1,205 @@
+#bagged id3 ensemble
+#
+# Random-forest-style bagging of ID3 trees; with max_features every node
+# scores a random subset of attributes, as in a random forest. The data is
+# integer-encoded once (columnar.encode / tabular.encode_table) and, for a
+# parallel fit, copied once into multiprocessing.shared_memory blocks that
+# every worker maps. A bootstrap is only a seed: the worker draws its row
+# indices and grows the tree on them with columnar.build(), which takes any
+# index array, repeated rows included. Prediction encodes the input per
+# tree with the vectorized compiled evaluator and takes a majority vote.
+
+import multiprocessing
+import os
+import numpy as np
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor
+from base.classifier import Classifier
+from columnar import encode, build, numeric_indices, n_features
+from compiled import LeafCounts
+from tabular import is_table, table_columns, training_columns, encode_table, label_array
+from id3 import ID3
+
+
+def bootstrap(seed, n, max_samples):
+    # sorted row indices of one bootstrap: ties keep breaking by data order
+    rng = np.random.default_rng(seed)
+    return np.sort(rng.integers(0, n, max(1, int(round(max_samples * n)))))
+
+
+def fit_tree(X, y, attributes, categories, classes, seed, max_samples, order, numeric, max_features=None):
+    """
+    Tree and leaf counts (LeafCounts.gather() rows) of one bootstrap. seed
+    is a SeedSequence; the attribute draws of max_features come from a
+    child of it, independent of the bootstrap.
+    """
+    rows = bootstrap(seed, len(y), max_samples)
+    leaf_counts = LeafCounts()
+    nodes = np.random.SeedSequence(seed.entropy, spawn_key=seed.spawn_key + (0,))
+    tree = build(X, y, attributes, categories, classes, rows, list(range(len(attributes))), order,
+                 numeric=numeric, leaf_counts=leaf_counts, max_features=max_features, random_state=nodes)
+    return tree, leaf_counts.gather(tree)
+
+
+_worker = {}
+
+
+def _init_worker(blocks, attributes, categories, classes, max_samples, order, numeric, max_features):
+    # map the encoded arrays; the blocks stay open for the worker's lifetime
+    arrays = {}
+    for key, (name, shape, dtype, layout) in blocks.items():
+        shm = shared_memory.SharedMemory(name=name)
+        _worker[key + "_shm"] = shm
+        arrays[key] = np.ndarray(shape, dtype=dtype, buffer=shm.buf, order=layout)
+    _worker.update(X=arrays["X"], y=arrays["y"], attributes=attributes, categories=categories, classes=classes,
+                   max_samples=max_samples, order=order, numeric=numeric, max_features=max_features)
+
+
+def _fit_tree(seed):
+    w = _worker
+    return fit_tree(w["X"], w["y"], w["attributes"], w["categories"], w["classes"], seed, w["max_samples"],
+                    w["order"], w["numeric"], w["max_features"])
+
+
+def to_shared(array):
+    """
+    Copy an array into a new shared memory block.
+
+    Returns:
+        tuple: (block, (name, shape, dtype, order)) - the description maps it
+               again with np.ndarray(shape, dtype, buffer=block.buf, order=order)
+    """
+    layout = "F" if array.flags.f_contiguous and not array.flags.c_contiguous else "C"
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf, order=layout)[...] = array
+    return shm, (shm.name, array.shape, array.dtype.str, layout)
+
+
+class BaggedID3(Classifier):
+    def __init__(self, n_estimators=10, max_samples=1.0, order="breadth", random_state=None, max_features=None):
+        # n_estimators: trees, each grown on its own bootstrap sample
+        # max_samples:  bootstrap size as a fraction of the rows
+        # order:        columnar build order of every tree
+        # random_state: seed of the bootstraps and attribute draws; a fixed
+        #               seed gives the same trees for any n_jobs
+        # max_features: attributes every node scores, drawn at random as in
+        #               ID3(max_features=...); None scores all (plain bagging)
+        if n_estimators < 1:
+            raise ValueError(f"n_estimators must be at least 1, got {n_estimators}.")
+        if not 0 < max_samples <= 1:
+            raise ValueError(f"max_samples must be in (0, 1], got {max_samples}.")
+        n_features(max_features, 1)
+        self.n_estimators = n_estimators
+        self.max_samples = max_samples
+        self.order = order
+        self.random_state = random_state
+        self.max_features = max_features
+        self.estimators_ = None
+        self.classes_ = None
+        self.attributes_ = None
+        self.is_fitted_ = False
+
+    def fit(self, data, attributes=None, label_key=None, n_jobs=1, numeric=None, y=None, columns=None):
+        # data as for ID3.fit(): row dicts, a DataFrame or a 2-D ndarray
+        # n_jobs > 1 grows the trees on that many processes over shared memory
+        if n_jobs < 0:
+            n_jobs = os.cpu_count() or 1
+        if is_table(data):
+            attributes, cols, labels = training_columns(data, attributes, label_key, y, columns)
+            X, codes, categories, classes = encode_table(cols, labels)
+        else:
+            if attributes is None or label_key is None or y is not None:
+                raise ValueError("list[dict] data needs attributes and label_key (y is for table input).")
+            attributes = list(attributes)
+            X, codes, categories, classes = encode(data, attributes, label_key)
+        if not len(codes):
+            raise ValueError("Cannot fit an ensemble on an empty dataset.")
+        numeric = numeric_indices(attributes, categories, numeric)
+
+        seeds = np.random.SeedSequence(self.random_state).spawn(self.n_estimators)
+        args = (attributes, categories, classes, self.max_samples, self.order, numeric, self.max_features)
+        if n_jobs > 1 and self.n_estimators > 1:
+            results = self._fit_parallel(X, codes, args, seeds, n_jobs)
+        else:
+            results = [fit_tree(X, codes, *args[:3], seed, *args[3:]) for seed in seeds]
+
+        self.estimators_ = []
+        for tree, counts in results:
+            model = ID3(order=self.order)
+            model.tree_ = tree
+            model.attributes_ = list(attributes)
+            model.classes_ = list(classes)
+            model.leaf_counts_ = counts
+            model.is_fitted_ = True
+            self.estimators_.append(model)
+        self.classes_ = list(classes)
+        self.attributes_ = list(attributes)
+        self._labels = label_array(self.classes_)
+        self.is_fitted_ = True
+        return self
+
+    def _fit_parallel(self, X, y, args, seeds, n_jobs):
+        blocks, handles = {}, []
+        try:
+            for key, array in (("X", X), ("y", y)):
+                shm, blocks[key] = to_shared(array)
+                handles.append(shm)
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("fork" if "fork" in methods else None)
+            with ProcessPoolExecutor(min(n_jobs, len(seeds)), mp_context=context, initializer=_init_worker,
+                                     initargs=(blocks, *args)) as pool:
+                return list(pool.map(_fit_tree, seeds))
+        finally:
+            for shm in handles:
+                shm.close()
+                shm.unlink()
+
+    def _tables(self, X, columns):
+        # input as {attribute: column}, built once for all trees
+        if is_table(X):
+            return table_columns(X, columns or self.attributes_), len(X)
+        rows = list(X)
+        table = {}
+        for a in self.attributes_:
+            column = np.empty(len(rows), dtype=object)
+            column[:] = [row.get(a) for row in rows]
+            table[a] = column
+        return table, len(rows)
+
+    def votes(self, X, columns=None):
+        """
+        (n, n_classes) number of trees voting for each class, columns in
+        classes_ order. X as for predict().
+        """
+        if not self.is_fitted_:
+            raise RuntimeError("Model is not trained. Call fit() first.")
+        table, n = self._tables(X, columns)
+        K = len(self.classes_)
+        votes = np.zeros(n * K, dtype=np.int64)
+        offsets = np.arange(n) * K
+        for model in self.estimators_:
+            compiled = model.compile()
+            # every tree's classes are the ensemble's classes_
+            votes += np.bincount(offsets + compiled.predict_codes(compiled.encode_table(table, n)), minlength=n * K)
+        return votes.reshape(n, K)
+
+    def predict(self, X, columns=None):
+        # majority vote, ties to the class seen first in training;
+        # X: one row dict (returns its label), row dicts, a DataFrame or a
+        #    2-D ndarray with `columns` (default attributes_)
+        if isinstance(X, dict):
+            return self.predict([X])[0]
+        return self._labels[np.argmax(self.votes(X, columns), axis=1)]
+
+    def predict_proba(self, X, columns=None):
+        # mean of the trees' predict_proba(), columns in classes_ order
+        if not self.is_fitted_:
+            raise RuntimeError("Model is not trained. Call fit() first.")
+        if isinstance(X, dict):
+            return self.predict_proba([X])[0]
+        table, n = self._tables(X, columns)
+        P = np.zeros((n, len(self.classes_)))
+        for model in self.estimators_:
+            compiled = model.compile()
+            P += compiled.proba_codes(compiled.encode_table(table, n))
+        return P / len(self.estimators_)
@@ -1,43 +1,92 @@
 from collections import Counter
-from math import log2
+from functools import lru_cache
+import numpy as np
 
-def entropy(labels):
+# integer counts below this size get n·log2(n) from a precomputed table
+NLOGN_TABLE_SIZE = 1 << 16
+
+
+@lru_cache(maxsize=None)
+def nlogn_table(size=NLOGN_TABLE_SIZE):
+    ## T[n] = n · log2(n),   T[0] = 0
+    n = np.arange(size, dtype=np.float64)
+    return n * np.log2(n, out=np.zeros_like(n), where=n > 0)
+
+
+def xlogx(n, table_size=NLOGN_TABLE_SIZE):
+    """
+    Elementwise n · log2(n) with 0 · log2(0) = 0. Non-negative integer counts
+    below table_size are looked up in nlogn_table, everything else is computed.
+    """
+    n = np.asarray(n)
+    if n.dtype.kind in "iu" and n.size and table_size:
+        table = nlogn_table(table_size)
+        if n.min() >= 0 and n.max() < table_size:
+            return table[n]
+    n = n.astype(np.float64)
+    return n * np.log2(n, out=np.zeros_like(n), where=n > 0)
+
+
+def entropies(counts, table_size=NLOGN_TABLE_SIZE):
+    """
+    Compute the entropy of every subset in one call.
+
+    Steps:
+        counts  - 2-D array of class counts, one row per subset
+        N       - row totals |S|
+        H(S)    - (N·log2(N) - Σ_c n_c·log2(n_c)) / N   per row, 0 for empty rows
+
+    Returns:
+        ndarray: one entropy value in bits per row
+    """
+    counts = np.atleast_2d(counts)
+    N = counts.sum(axis=1)
+    H_n = xlogx(N, table_size) - xlogx(counts, table_size).sum(axis=1)
+    H = np.divide(H_n, N, out=np.zeros(len(N)), where=N > 0)
+    # weighted (float) counts can round a pure subset to -0.0000…1
+    return np.maximum(H, 0.0)
+
+
+def entropy(labels, sample_weight=None):
     """
     Compute the entropy of a categorical label list.
 
     Steps:
-        counts         - absolute frequency of each label
-        N              - total number of samples
-        p              - relative class probabilities
-        contributions  - individual entropy terms (-p*log2(p))
-        H(S)           - total entropy (sum of contributions)
+        counts  - absolute frequency of each label, or the summed
+                  sample_weight of its rows (one weight per label)
+        H(S)    - entropies() of that single row of counts
 
     Returns:
         float: entropy value in bits
     """
-    
-    counts = Counter(labels)
-    
+    counts = Counter(labels) if sample_weight is None else weighted_counts(labels, sample_weight)
+    return entropy_from_counts(counts.values())
+
+
+def weighted_counts(keys, sample_weight):
+    # {key: summed weight}, keys in order of first appearance
+    counts = {}
+    for k, w in zip(keys, sample_weight):
+        counts[k] = counts.get(k, 0) + w
+    return counts
+
+
+def entropy_from_counts(counts):
+    """
+    Entropy of a label distribution given as absolute class counts
+    (e.g. Counter(labels).values(), or weighted counts), without the labels
+    themselves.
+
+    Returns:
+        float: entropy value in bits
+    """
+
     ## H(S) = - Σ (p_c · log2(p_c))   for all c
 
-    N = sum(counts.values())
-    if N == 0:
+    counts = list(counts)
+    if not counts:
         return 0.0
-    p = {}
-    for c, n in counts.items():
-        p[c] = n / N
-    contributions = {}
-    for c, p_c in p.items():
-        if p_c > 0:
-            contributions[c] = -p_c * log2(p_c)
-        else:
-            contributions[c] = 0
-    H = sum(contributions.values())
-
-    return H
-    
-
-    
+    return float(entropies([counts])[0])
 
 
 # if __name__ == "__main__":
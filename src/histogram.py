@@ -0,0 +1,275 @@
+#histogram id3
+#
+# For large numeric data. Every numeric attribute is binned once into at most
+# 256 quantile bins (utils.discretize.fit_quantile_bins edges) and stored as
+# uint8 codes. A node is scored from its per-bin class histograms, the same
+# value × class tables as columnar.contingency(); a numeric cut is a sweep over
+# the bins, so once a node's histograms exist its split costs O(bins), not
+# O(rows). Only the smaller children are counted from their rows, the largest
+# child's histograms are the parent's minus its siblings'.
+
+import numpy as np
+import pandas as pd
+from columnar import (contingency, best_attribute, majority, partition, check_weights, weighted_count, dedupe,
+                      TIE_TOL, positive_classes)
+from criteria import entropy_gain, get_criterion, cut_scores
+from utils.discretize import fit_quantile_bins
+from tabular import factorize_sorted, factorize_labels
+
+MAX_BINS = 256
+
+
+def fit_edges(columns, numeric, max_bins=MAX_BINS):
+    """
+    Quantile bin edges of the numeric attributes, at most max_bins bins each.
+    `columns` maps attribute names to their values.
+    """
+    if not 2 <= max_bins <= MAX_BINS:
+        raise ValueError(f"max_bins must be between 2 and {MAX_BINS}, got {max_bins}.")
+    frame = pd.DataFrame({a: np.asarray(columns[a], dtype=np.float64) for a in numeric})
+    edges = fit_quantile_bins(frame, n_bins=max_bins)
+    for a, e in edges.items():
+        # a constant column collapses to one edge; keep it as one bin
+        if len(e) < 2:
+            edges[a] = np.repeat(e, 2)
+    return edges
+
+
+def bin_codes(values, edges):
+    """
+    Bin index of every value, as pd.cut(..., include_lowest=True) assigns it:
+    bin b holds (edges[b], edges[b + 1]]. Values outside the edges go to the
+    first or last bin.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if np.isnan(values).any():
+        raise ValueError("Histogram binning does not support missing (NaN) values.")
+    return np.searchsorted(edges[1:-1], values, side="left").astype(np.uint8)
+
+
+def encode_binned(columns, labels, attributes, edges):
+    """
+    Like columnar.encode(), but attributes with bin edges become uint8 bin codes
+    and all codes are uint8, so every attribute has at most 256 values.
+    columns[j] holds the values of attributes[j]: a list, or an array / Series
+    coded column-wise by tabular.factorize_sorted().
+
+    Returns:
+        tuple: (X, y, categories, classes) - categories of a binned attribute
+               are its bin indices
+    """
+    n = len(labels)
+    X = np.empty((n, len(attributes)), dtype=np.uint8, order="F")
+    categories = []
+    for j, (a, column) in enumerate(zip(attributes, columns)):
+        if a in edges:
+            if len(edges[a]) - 1 > MAX_BINS:
+                raise ValueError(f"Attribute {a!r} has {len(edges[a]) - 1} bins, histogram mode allows {MAX_BINS}.")
+            X[:, j] = bin_codes(column, edges[a])
+            categories.append(list(range(len(edges[a]) - 1)))
+            continue
+        if isinstance(column, list):
+            values = set(column)
+            if any(v != v for v in values):
+                raise ValueError(f"Attribute {a!r} has missing (NaN) values.")
+            values = sorted(values)
+            index = {v: i for i, v in enumerate(values)}
+            codes = np.fromiter((index[v] for v in column), dtype=np.int32, count=n)
+        else:
+            codes, values = factorize_sorted(column)
+        if len(values) > MAX_BINS:
+            raise ValueError(f"Attribute {a!r} has {len(values)} values, histogram mode allows {MAX_BINS}.")
+        X[:, j] = codes
+        categories.append(values)
+
+    if isinstance(labels, list):
+        classes = list(dict.fromkeys(labels))
+        index = {c: i for i, c in enumerate(classes)}
+        y = np.fromiter((index[c] for c in labels), dtype=np.int32, count=n)
+    else:
+        y, classes = factorize_labels(labels)
+    return X, y, categories, classes
+
+
+def cut_gains(table, starts, counts, score=entropy_gain):
+    """
+    Best binary cut "bin <= b" of every attribute block of a node's histogram
+    table, from cumulative class counts over its non-empty bins (an empty bin
+    only repeats the cut before it). counts are the node's class counts and
+    score (a criteria.py function) rates the cuts.
+
+    Returns:
+        tuple: (gain, b) per block - gain is -inf and b = -1 when fewer than
+               two bins of the block are non-empty
+    """
+    sizes = np.diff(np.append(starts, len(table)))
+    bins = np.flatnonzero(table.any(axis=1))
+    block = np.repeat(np.arange(len(starts)), sizes)[bins]
+    table = table[bins]
+    first = np.searchsorted(block, np.arange(len(starts)))
+    cum = np.cumsum(table, axis=0)
+    before = np.concatenate((np.zeros((1, table.shape[1]), dtype=cum.dtype), cum))[first]
+    left = cum - before[block]
+    # nothing is right of the last non-empty bin of a block; tested by
+    # position, as weighted counts may leave rounding residue there
+    last = np.append(block[1:] != block[:-1], True)
+    gains = np.where(last, -np.inf, cut_scores(score, left, np.broadcast_to(counts, left.shape)))
+
+    top = np.maximum.reduceat(gains, first)
+    # lowest cut within TIE_TOL of the block's best
+    hit = np.flatnonzero(np.isfinite(gains) & (gains >= top[block] - TIE_TOL))
+    hit = hit[np.unique(block[hit], return_index=True)[1]]
+    gain = np.full(len(starts), -np.inf)
+    cut = np.full(len(starts), -1, dtype=np.intp)
+    gain[block[hit]] = gains[hit]
+    cut[block[hit]] = bins[hit] - starts[block[hit]]
+    return gain, cut
+
+
+def build_histogram(X, y, attributes, categories, classes, edges, leaf_counts=None, sample_weight=None,
+                    criterion="entropy"):
+    """
+    Grow the tree depth-first over the binned arrays. Attributes in `edges`
+    get binary splits {"attr", "threshold", "children": {True: <=, False: >}, "default"}
+    at a bin edge and stay available below them; the others split by value
+    as in id3.id3(). leaf_counts (compiled.LeafCounts) receives the class
+    counts of every leaf. With sample_weight the histograms sum weights and
+    rows of weight 0 are left out. criterion picks the split score, a
+    criteria.CRITERIA name or function.
+    """
+    n_values = [len(c) for c in categories]
+    n_classes = len(classes)
+    all_attrs = list(range(X.shape[1]))
+    binned = np.array([a in edges for a in attributes], dtype=bool)
+    nominal = ~binned
+    score = get_criterion(criterion)
+    if leaf_counts is not None:
+        leaf_counts.classes = list(classes)
+    w = check_weights(sample_weight, len(y))
+    index = np.arange(len(y)) if w is None else np.flatnonzero(w)
+    if not len(index):
+        return None
+    rows = index
+    table, starts = contingency(X, y[rows], rows, all_attrs, n_values, n_classes, None if w is None else w[rows])
+
+    root = {}
+    stack = [(root, None, 0, len(index), all_attrs, table)]
+    while stack:
+        parent, key, start, end, attrs, table = stack.pop()
+        rows = index[start:end]
+        if n_values:
+            counts = table[:n_values[0]].sum(axis=0)
+        else:
+            counts = weighted_count(y[rows], None if w is None else w[rows], n_classes)
+        if leaf_counts is not None:
+            # recorded now, kept only if the node stays a leaf
+            leaf_counts.add(parent, key, counts)
+        if np.count_nonzero(counts) == 1:
+            parent[key] = classes[int(np.argmax(counts))]
+            continue
+        top = np.flatnonzero(counts == counts.max())
+        # only a tie needs the rows to find the class seen first
+        default = classes[top[0] if len(top) == 1 else majority(y[rows], counts)]
+        if not attrs:
+            parent[key] = default
+            continue
+
+        scores = np.full(len(attributes), -np.inf)
+        cut = None
+        if nominal.any():
+            scores[nominal] = score(table, starts, counts)[nominal]
+        if binned.any():
+            cut_gain, cut = cut_gains(table, starts, counts, score)
+            scores[binned] = cut_gain[binned]
+        allowed = np.zeros(len(attributes), dtype=bool)
+        allowed[attrs] = True
+        scores[~allowed] = -np.inf
+        if not np.isfinite(scores.max()):
+            parent[key] = default
+            continue
+
+        best = best_attribute(scores)
+        codes = X[rows, best]
+        if binned[best]:
+            codes = (codes > cut[best]).astype(np.uint8)
+            keys = (True, False)
+            node = {
+                "attr": attributes[best],
+                "threshold": float(edges[attributes[best]][cut[best] + 1]),
+                "children": {},
+                "default": default,
+            }
+            remaining = attrs
+        else:
+            keys = categories[best]
+            node = {"attr": attributes[best], "children": {}, "default": default}
+            remaining = [a for a in attrs if a != best]
+        parent[key] = node
+        child_counts, bounds = partition(index, start, end, codes, len(keys))
+
+        # count every child but the largest, which is the parent minus the rest;
+        # float weights would leave rounding residue in empty cells of that
+        # difference, so then every child is counted
+        present = np.flatnonzero(child_counts)
+        largest = present[np.argmax(child_counts[present])] if table.dtype.kind in "iu" else -1
+        tables = {}
+        rest = table.copy()
+        for v in present:
+            if v != largest:
+                rows = index[bounds[v]:bounds[v + 1]]
+                tables[v] = contingency(X, y[rows], rows, all_attrs, n_values, n_classes,
+                                        None if w is None else w[rows])[0]
+                rest -= tables[v]
+        if largest >= 0:
+            tables[largest] = rest
+
+        child_items = []
+        for v in present:
+            # placeholder keeps the children in value order
+            node["children"][keys[v]] = None
+            child_items.append((node["children"], keys[v], bounds[v], bounds[v + 1], remaining, tables[v]))
+        stack.extend(reversed(child_items))
+    return root[None]
+
+
+def id3_histogram(dataset, attributes, label_key, numeric=None, max_bins=MAX_BINS, edges=None, leaf_counts=None,
+                  sample_weight=None, dedupe_rows=True, criterion="entropy"):
+    """
+    Front end for list[dict] data: bin the numeric attributes (quantile edges
+    fitted here unless given), encode once, then build on the uint8 codes.
+
+    Returns:
+        tuple: (tree, edges)
+    """
+    columns = [[row[a] for row in dataset] for a in attributes]
+    labels = [row[label_key] for row in dataset]
+    return id3_histogram_columns(columns, labels, attributes, numeric, max_bins, edges, leaf_counts, sample_weight,
+                                 dedupe_rows, criterion)
+
+
+def id3_histogram_columns(columns, labels, attributes, numeric=None, max_bins=MAX_BINS, edges=None,
+                          leaf_counts=None, sample_weight=None, dedupe_rows=True, criterion="entropy"):
+    """
+    id3_histogram() for column data, columns[j] holding attributes[j].
+    With dedupe_rows the binned rows are collapsed into weighted patterns
+    first (columnar.dedupe()), which yields the same tree.
+
+    Returns:
+        tuple: (tree, edges)
+    """
+    numeric = list(numeric or ())
+    unknown = [a for a in numeric if a not in attributes]
+    if unknown:
+        raise ValueError(f"Numeric attributes {unknown} are not in attributes.")
+    if not len(labels):
+        if leaf_counts is not None:
+            leaf_counts.classes = []
+        return None, {}
+    if edges is None:
+        edges = fit_edges(dict(zip(attributes, columns)), numeric, max_bins) if numeric else {}
+    X, y, categories, classes = encode_binned(columns, labels, attributes, edges)
+    sample_weight = check_weights(sample_weight, len(y))
+    y, classes = positive_classes(y, classes, sample_weight)
+    if dedupe_rows:
+        X, y, sample_weight = dedupe(X, y, sample_weight)
+    return build_histogram(X, y, attributes, categories, classes, edges, leaf_counts, sample_weight, criterion), edges
@@ -0,0 +1,140 @@
+#streaming id3 (Hoeffding tree / VFDT)
+#
+# Rows are consumed one at a time and only leaves keep sufficient statistics:
+# class counts and {attribute: {value: {label: count}}} tables of the rows seen
+# since the leaf was created. A leaf is split
+# once the Hoeffding bound says the best attribute's information gain beats
+# the runner-up's with probability 1 - delta.
+
+from math import log2
+from base.classifier import Classifier
+from criteria import hoeffding_bound
+from entropy import entropy_from_counts
+from split_entropy import split_entropy_from_table
+from id3 import walk
+
+
+class HoeffdingTree(Classifier):
+    def __init__(self, attributes, label_key, delta=1e-7, tie_threshold=0.05, grace_period=200,
+                 max_leaves=1000, max_values=256):
+        # delta          - allowed probability of choosing the wrong attribute
+        # tie_threshold  - split anyway once ε drops below this (near-equal gains)
+        # grace_period   - rows a leaf sees between split attempts
+        # max_leaves     - leaves stop splitting once the tree has this many
+        # max_values     - distinct values tracked per attribute and leaf
+        # memory stays below max_leaves × attributes × max_values × classes counters
+        self.attributes = list(attributes)
+        self.label_key = label_key
+        self.delta = delta
+        self.tie_threshold = tie_threshold
+        self.grace_period = grace_period
+        self.max_leaves = max_leaves
+        self.max_values = max_values
+        self.is_fitted_ = False
+        self._root = None
+        self._n_leaves = 0
+        # tree_ cache, dropped by every partial_fit()
+        self._tree_ = None
+
+    def fit(self, X, y=None):
+        # X: iterable of row dicts with the label under label_key (may be a generator)
+        self._root = None
+        self._n_leaves = 0
+        return self.partial_fit(X)
+
+    def partial_fit(self, X, y=None):
+        # X: one row dict or an iterable of them (a mini-batch)
+        if self._root is None:
+            self._root = self._leaf(self.attributes)
+        for row in ([X] if isinstance(X, dict) else X):
+            self._learn(row)
+        self._tree_ = None
+        self.is_fitted_ = bool(self._root["counts"])
+        return self
+
+    @property
+    def tree_(self):
+        # nested dict view of the current tree, rebuilt on first access after
+        # an update instead of on every partial_fit() (O(tree size) each)
+        if self._tree_ is None and self._root is not None and self._root["counts"]:
+            self._tree_ = self._tree(self._root)
+        return self._tree_
+
+    def predict(self, X):
+        if not self.is_fitted_:
+            raise RuntimeError("Model is not trained. Call fit() first.")
+        tree = self.tree_
+        if isinstance(X, dict):
+            return walk(tree, X)
+        return [walk(tree, sample) for sample in X]
+
+    def _leaf(self, attrs):
+        self._n_leaves += 1
+        # counts: class counts of every row that reached this node, also before
+        #         it was a leaf (majority label only); stats: class counts of
+        #         the rows its tables saw, the sample of the split test
+        return {"counts": {}, "stats": {}, "tables": {a: {} for a in attrs}, "attrs": attrs, "seen": 0}
+
+    def _learn(self, row):
+        c = row[self.label_key]
+        node = self._root
+        while "attr" in node:
+            node["counts"][c] = node["counts"].get(c, 0) + 1
+            v = row[node["attr"]]
+            child = node["children"].get(v)
+            if child is None:
+                if self._n_leaves >= self.max_leaves:
+                    return
+                remaining = [a for a in node["attrs"] if a != node["attr"]]
+                child = node["children"][v] = self._leaf(remaining)
+            node = child
+
+        node["counts"][c] = node["counts"].get(c, 0) + 1
+        node["stats"][c] = node["stats"].get(c, 0) + 1
+        for a, table in node["tables"].items():
+            v = row[a]
+            counts = table.get(v)
+            if counts is None:
+                if len(table) >= self.max_values:
+                    continue
+                counts = table[v] = {}
+            counts[c] = counts.get(c, 0) + 1
+
+        node["seen"] += 1
+        if node["seen"] % self.grace_period == 0:
+            self._try_split(node)
+
+    def _try_split(self, node):
+        # H(S), H(S|A) and the sample size of ε all come from the rows the
+        # leaf's own tables saw, not from counts inherited from its parent
+        counts = node["stats"]
+        if len(counts) < 2 or not node["attrs"] or self._n_leaves >= self.max_leaves:
+            return
+        H_S = entropy_from_counts(counts.values())
+        classes = list(counts)
+        i_g = {a: H_S - split_entropy_from_table(node["tables"][a], classes) for a in node["attrs"]}
+
+        # runner-up is the next attribute, or not splitting at all (gain 0)
+        ranked = sorted(i_g, key=i_g.get, reverse=True)
+        best = ranked[0]
+        second = i_g[ranked[1]] if len(ranked) > 1 else 0.0
+        eps = hoeffding_bound(log2(len(counts)), self.delta, sum(counts.values()))
+        if i_g[best] - second > eps or (eps < self.tie_threshold and i_g[best] > 0):
+            remaining = [a for a in node["attrs"] if a != best]
+            children = {}
+            for v, value_counts in node["tables"][best].items():
+                child = self._leaf(remaining)
+                child["counts"] = dict(value_counts)
+                children[v] = child
+            self._n_leaves -= 1
+            attrs, inherited = node["attrs"], node["counts"]
+            node.clear()
+            node.update({"attr": best, "attrs": attrs, "children": children, "counts": inherited})
+
+    def _tree(self, node):
+        # nested dict view in the id3.id3() format; leaves predict their majority
+        label = max(node["counts"], key=node["counts"].get) if node["counts"] else None
+        if "attr" not in node:
+            return label
+        children = {v: self._tree(child) for v, child in node["children"].items() if child["counts"]}
+        return {"attr": node["attr"], "children": children, "default": label}
@@ -1,44 +1,307 @@
 #id3 logic
 
-from selection import selection
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from selection import selection, weighted_counts
 from collections import Counter
 from base.classifier import Classifier
+from columnar import id3_columnar, id3_encoded, check_weights, n_features
+from incremental import IncrementalTree
+from out_of_core import id3_csv
+from histogram import id3_histogram, id3_histogram_columns, MAX_BINS
+from tabular import is_table, table_columns, training_columns, encode_table, rows_of
+from compiled import compile_tree, LeafCounts
+from criteria import get_criterion, score_range
+from codegen import compile_predictor
+from serialize import save_compiled, load_compiled
+from batch import predict_chunks
+
+ENGINES = ("columnar", "dict", "histogram")
 
 class ID3(Classifier):
-    def __init__(self):
+    def __init__(self, engine="columnar", order="breadth", max_bins=MAX_BINS, dedupe=True, criterion="entropy",
+                 max_features=None, sample_rows=None, delta=1e-7, random_state=None):
+        # engine: "columnar" encodes the data once into NumPy arrays,
+        #         "dict" is the reference list[dict] implementation below,
+        #         "histogram" bins numeric attributes into uint8 codes and
+        #         splits them from per-bin class histograms
+        # order:  columnar build order, "depth" or "breadth" (level-wise batches)
+        # max_bins: quantile bins per numeric attribute (histogram engine, <= 256)
+        # dedupe: build on the distinct encoded rows weighted by their counts
+        #         (columnar and histogram engines); the tree is the same
+        #         unless rows are sampled (sample_rows draws from the patterns)
+        # criterion: split score, "entropy" (information gain), "gain_ratio",
+        #         "gini" (no logarithms, cheapest) or a function
+        #         f(table, starts, counts) -> scores as in criteria.py
+        # max_features: attributes each node scores, drawn at random from
+        #         its remaining ones: a count, a fraction of all attributes,
+        #         "sqrt" or "log2"; None scores all (columnar engine)
+        # sample_rows: nodes with columnar.SAMPLE_MIN_RATIO × sample_rows rows
+        #         or more pick their attribute on a sample of that many rows
+        #         when the Hoeffding bound says the choice holds with
+        #         probability 1 - delta, and are scored exactly otherwise
+        #         (columnar engine, built-in criteria); children are always
+        #         built on all rows
+        # random_state: seed of those draws; a fixed seed gives the same
+        #         tree for any order and n_jobs (and dedupe, unless rows are
+        #         sampled)
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine {engine!r}, expected one of {ENGINES}.")
+        n_features(max_features, 1)
+        if sample_rows is not None:
+            if not isinstance(sample_rows, (int, np.integer)) or sample_rows < 1:
+                raise ValueError(f"sample_rows must be a positive int, got {sample_rows!r}.")
+            if score_range(get_criterion(criterion), 2) is None:
+                raise ValueError("sample_rows needs a built-in criterion, the score range of a function is unknown.")
+        if not 0 < delta < 1:
+            raise ValueError(f"delta must be in (0, 1), got {delta!r}.")
+        get_criterion(criterion)
+        self.engine = engine
+        self.order = order
+        self.max_bins = max_bins
+        self.dedupe = dedupe
+        self.criterion = criterion
+        self.max_features = max_features
+        self.sample_rows = sample_rows
+        self.delta = delta
+        self.random_state = random_state
         self.tree_ = None
+        self.attributes_ = None
+        # class counts of every leaf (compiled.leaf_slots order), columns in classes_ order
+        self.classes_ = None
+        self.leaf_counts_ = None
         self.is_fitted_ = False
-        
-    
-    def fit(self, data, attributes, label_key):
-        self.tree_ = id3(data, attributes, label_key)
+        self._incremental = None
+        self._compiled = None
+        self._predictor = None
+
+
+    def fit(self, data, attributes=None, label_key=None, n_jobs=1, numeric=None, y=None, columns=None,
+            sample_weight=None):
+        # data: list of row dicts, a pandas DataFrame (categorical columns included)
+        #       or a 2-D ndarray whose columns are named by `columns` (default:
+        #       attributes, then label_key); tables may give the labels as y
+        #       and default attributes to every other column
+        # n_jobs > 1 builds large subtrees (columnar engine) or scores large
+        #        nodes (dict engine) in a process pool
+        # numeric: attributes split C4.5-style at a threshold (<= / >) instead of
+        #          one child per value, no discretization needed (columnar engine)
+        # sample_weight: one non-negative weight per row; every count becomes
+        #          a sum of weights (integer weights act like repeated rows),
+        #          rows of weight 0 are ignored
+        if n_jobs < 0:
+            n_jobs = os.cpu_count() or 1
+        if self.engine == "histogram" and n_jobs > 1:
+            raise ValueError("n_jobs > 1 requires engine='columnar' or 'dict'.")
+        if self.engine == "dict" and numeric:
+            raise ValueError("numeric attributes require engine='columnar' or 'histogram'.")
+        if self.engine != "columnar" and (self.max_features is not None or self.sample_rows is not None):
+            raise ValueError("max_features and sample_rows require engine='columnar'.")
+
+        leaf_counts = LeafCounts()
+        if is_table(data):
+            attributes, cols, labels = training_columns(data, attributes, label_key, y, columns)
+            if self.engine == "dict":
+                label_key = "__label__" if label_key is None else label_key
+                rows = rows_of(attributes, cols, labels, label_key)
+                self.tree_ = id3_weighted(rows, attributes, label_key, leaf_counts, sample_weight, self.criterion,
+                                          n_jobs)
+            elif self.engine == "histogram":
+                self.tree_, self.edges_ = id3_histogram_columns(cols, labels, attributes, numeric, self.max_bins,
+                                                                leaf_counts=leaf_counts, sample_weight=sample_weight,
+                                                                dedupe_rows=self.dedupe, criterion=self.criterion)
+            else:
+                X, codes, categories, classes = encode_table(cols, labels)
+                self.tree_ = id3_encoded(X, codes, categories, classes, attributes, self.order, n_jobs, numeric,
+                                         leaf_counts, sample_weight, self.dedupe, self.criterion, self.max_features,
+                                         self.sample_rows, self.delta, self.random_state)
+        else:
+            if attributes is None or label_key is None or y is not None:
+                raise ValueError("list[dict] data needs attributes and label_key (y is for table input).")
+            if self.engine == "dict":
+                self.tree_ = id3_weighted(data, attributes, label_key, leaf_counts, sample_weight, self.criterion,
+                                          n_jobs)
+            elif self.engine == "histogram":
+                # bin edges of the numeric attributes are kept in edges_
+                self.tree_, self.edges_ = id3_histogram(data, attributes, label_key, numeric, self.max_bins,
+                                                        leaf_counts=leaf_counts, sample_weight=sample_weight,
+                                                        dedupe_rows=self.dedupe, criterion=self.criterion)
+            else:
+                self.tree_ = id3_columnar(data, attributes, label_key, self.order, n_jobs, numeric, leaf_counts,
+                                          sample_weight, self.dedupe, self.criterion, self.max_features,
+                                          self.sample_rows, self.delta, self.random_state)
+        self.attributes_ = list(attributes)
+        self._fitted(leaf_counts)
+        self._incremental = None
+        return self
+
+    def _fitted(self, leaf_counts):
+        # after every fit: leaf counts of the new tree_, caches reset
+        self.classes_ = list(leaf_counts.classes or ())
+        self.leaf_counts_ = leaf_counts.gather(self.tree_)
+        self._compiled = None
+        self._predictor = None
         self.is_fitted_ = True
+
+    def fit_csv(self, path, label_key, attributes=None, edges=None, n_bins=4, chunksize=100_000):
+        # out-of-core fit: stream the CSV in chunks, discretize with quantile
+        # edges (fitted on a streamed sample unless given, kept in edges_) and
+        # grow the tree one level per pass over the file
+        self._own_engine("fit_csv")
+        leaf_counts = LeafCounts()
+        self.tree_, self.edges_ = id3_csv(path, label_key, attributes, edges, n_bins, chunksize, leaf_counts,
+                                          self.criterion)
+        self.attributes_ = None if attributes is None else list(attributes)
+        self._fitted(leaf_counts)
+        self._incremental = None
+        return self
+
+    def partial_fit(self, data, attributes=None, label_key=None):
+        # keeps per-node counts (and leaf rows) so later batches only update
+        # the affected subtrees; the tree always equals fit() on all rows so far
+        if self._incremental is None:
+            self._own_engine("partial_fit")
+            if self.is_fitted_:
+                raise RuntimeError("Model was trained with fit(); start incremental training with partial_fit().")
+            if attributes is None or label_key is None:
+                raise ValueError("The first partial_fit() call needs attributes and label_key.")
+            self._incremental = IncrementalTree(attributes, label_key, self.criterion)
+        self._incremental.update(data)
+        leaf_counts = LeafCounts()
+        self.tree_ = self._incremental.tree(leaf_counts)
+        self.attributes_ = list(self._incremental.attributes)
+        self._fitted(leaf_counts)
+        self.is_fitted_ = self.tree_ is not None
         return self
 
-    def predict(self, X):
+    def _own_engine(self, method):
+        # fit_csv() and partial_fit() build with their own engines, which
+        # support none of these options
+        if self.engine != "columnar" or self.max_features is not None or self.sample_rows is not None:
+            raise ValueError(f"{method}() uses its own engine and supports neither engine, max_features nor "
+                             "sample_rows; leave them at their defaults.")
+
+    def compile(self):
+        # flat-array form of tree_ (compiled.CompiledTree), built once per fit
+        if not self.is_fitted_:
+            raise RuntimeError("Model is not trained. Call fit() first.")
+        if self._compiled is None:
+            self._compiled = compile_tree(self.tree_, self.attributes_, self.leaf_counts_, self.classes_)
+        return self._compiled
+
+    def predictor(self):
+        # tree_ as generated Python code (codegen): a plain function
+        # f(sample) -> label, the fastest way to score one row at a time
+        if not self.is_fitted_:
+            raise RuntimeError("Model is not trained. Call fit() first.")
+        if self._predictor is None:
+            # a loaded model has no tree_ until it is needed
+            tree = self.tree_ if self.tree_ is not None else self.compile().to_tree()
+            self._predictor = compile_predictor(tree)
+        return self._predictor
+
+    def save(self, path):
+        # binary model file (serialize): flat arrays and a value table
+        save_compiled(self.compile(), path)
+
+    @classmethod
+    def load(cls, path):
+        # memory-maps a file from save(); the arrays are shared between
+        # processes loading the same file and nothing is unpickled
+        model = cls()
+        model._compiled = load_compiled(path)
+        model.attributes_ = model._compiled.columns
+        model.classes_ = model._compiled.classes
+        model.is_fitted_ = True
+        return model
+
+    def predict(self, X, columns=None):
+        # X: one row dict (returns its label), an iterable of row dicts, a
+        #    DataFrame or a 2-D ndarray with `columns` (default attributes_);
+        #    batches return a NumPy array
         if not self.is_fitted_:
             raise RuntimeError("Model is not trained. Call fit() first.")
 
         if isinstance(X, dict):
-            node = self.tree_
-            while isinstance(node, dict) and "attr" in node:
-                attr = node["attr"]
-                val = X.get(attr, None)
-                node = node["children"].get(val, node["default"])
-            return node
-
-        out = []
-        for sample in X:
-            node = self.tree_
-            while isinstance(node, dict) and "attr" in node:
-                attr = node["attr"]
-                val = sample.get(attr, None)
-                node = node["children"].get(val, node["default"])
-            out.append(node)
-        return out
-
-
-def id3(dataset, attributes, label_key):
+            if self.tree_ is None and self._compiled is not None:
+                return self._compiled.predict([X])[0]
+            return walk(self.tree_, X)
+        # batches go through the compiled tree, level by level for all rows
+        if is_table(X):
+            return self.compile().predict_table(table_columns(X, columns or self.attributes_), len(X))
+        return self.compile().predict(X)
+
+    def predict_proba(self, X, columns=None):
+        # class probabilities, columns in classes_ order: the training class
+        # distribution of the leaf each row reaches (of the node, when a row
+        # takes a default child); X as in predict(), batches give (n, n_classes)
+        if not self.is_fitted_:
+            raise RuntimeError("Model is not trained. Call fit() first.")
+        if isinstance(X, dict):
+            return self.compile().predict_proba([X])[0]
+        if is_table(X):
+            return self.compile().predict_proba_table(table_columns(X, columns or self.attributes_), len(X))
+        return self.compile().predict_proba(X)
+
+    def predict_chunks(self, chunks, n_jobs=1, columns=None, proba=False):
+        # chunks: iterable of batches as for predict() (row dict lists,
+        #         DataFrames, 2-D ndarrays with `columns`), read lazily
+        # n_jobs > 1 scores them on that many processes sharing compile();
+        # yields one array per chunk (predict_proba() arrays with proba=True)
+        # in input order, with only a few chunks in memory at a time
+        if not self.is_fitted_:
+            raise RuntimeError("Model is not trained. Call fit() first.")
+        if n_jobs < 0:
+            n_jobs = os.cpu_count() or 1
+        return predict_chunks(self.compile(), chunks, n_jobs, columns or self.attributes_, proba)
+
+    def predict_codes(self, codes):
+        # class indices (into compile().classes) of a matrix from compile().encode()
+        return self.compile().predict_codes(codes)
+
+
+def walk(node, sample):
+    # follow one sample down a nested dict tree; unseen values take the default
+    # threshold nodes branch on val <= threshold (True / False)
+    while isinstance(node, dict) and "attr" in node:
+        attr = node["attr"]
+        val = sample.get(attr, None)
+        if "threshold" in node and val is not None:
+            val = val <= node["threshold"]
+        node = node["children"].get(val, node["default"])
+    return node
+
+
+def id3_weighted(dataset, attributes, label_key, leaf_counts=None, sample_weight=None, criterion="entropy",
+                 n_jobs=1):
+    # id3() on list[dict] rows with validated weights; rows of weight 0 are dropped
+    # n_jobs > 1 shares one process pool across every selection() of the build
+    w = check_weights(sample_weight, len(dataset))
+    if w is not None:
+        keep = np.flatnonzero(w)
+        dataset, sample_weight = [dataset[i] for i in keep], w[keep].tolist()
+    if n_jobs <= 1:
+        return id3(dataset, attributes, label_key, leaf_counts, sample_weight=sample_weight, criterion=criterion)
+    with ProcessPoolExecutor(n_jobs) as pool:
+        return id3(dataset, attributes, label_key, leaf_counts, sample_weight=sample_weight, criterion=criterion,
+                   n_jobs=n_jobs, pool=pool)
+
+
+def majority_label(labels, sample_weight=None):
+    # most frequent label (largest summed weight); ties go to the label seen first
+    if sample_weight is None:
+        return Counter(labels).most_common(1)[0][0]
+    totals = weighted_counts(labels, sample_weight)
+    return max(totals, key=totals.get)
+
+
+def id3(dataset, attributes, label_key, leaf_counts=None, parent=None, key=None, sample_weight=None,
+        criterion="entropy", n_jobs=1, pool=None):
+    # leaf_counts (compiled.LeafCounts) receives the class counts of every
+    # leaf; parent[key] is where the caller places the returned subtree
+    # sample_weight: one positive weight per row, counted instead of the row
+    # criterion, n_jobs, pool: passed to selection()
     if not dataset:
         return None
     
@@ -46,27 +309,40 @@ def id3(dataset, attributes, label_key):
     #extract labels
     for l in dataset:
         labels.append(l[label_key])
+    if leaf_counts is not None and leaf_counts.classes is None:
+        leaf_counts.classes = list(dict.fromkeys(labels))
     
     if len(set(labels)) == 1:
+        if leaf_counts is not None:
+            leaf_counts.add_labels(parent, key, labels, sample_weight)
         return labels[0]
     #stop condition
     if not attributes:
-     return Counter(labels).most_common(1)[0][0]
+     if leaf_counts is not None:
+         leaf_counts.add_labels(parent, key, labels, sample_weight)
+     return majority_label(labels, sample_weight)
     #select best attribute
-    best_attr, _igs = selection(dataset, attributes, label_key)
+    best_attr, _igs = selection(dataset, attributes, label_key, n_jobs=n_jobs, sample_weight=sample_weight,
+                                criterion=criterion, pool=pool)
     
     node = {
         "attr": best_attr,
         "children": {},
-        "default": Counter(labels).most_common(1)[0][0],
+        "default": majority_label(labels, sample_weight),
     }
     
-    values = sorted({row.get(best_attr, None) for row in dataset})
+    # partition the rows in one pass instead of one scan per value
+    subsets = {}
+    weights = {}
+    for i, row in enumerate(dataset):
+        subsets.setdefault(row[best_attr], []).append(row)
+        if sample_weight is not None:
+            weights.setdefault(row[best_attr], []).append(sample_weight[i])
     remaining = [a for a in attributes if a != best_attr]
 
-    for v in values:
-        subset = [row for row in dataset if row[best_attr] == v]
-        node["children"][v] = id3(subset, remaining, label_key) if subset else node["default"]
+    for v in sorted(subsets):
+        node["children"][v] = id3(subsets[v], remaining, label_key, leaf_counts, node["children"], v, weights.get(v),
+                                  criterion, n_jobs, pool)
 
     return node
 
@@ -0,0 +1,251 @@
+#incremental id3 (ID5R-style)
+#
+# Every node keeps its class counts and one value × class count table per
+# remaining attribute; leaves also keep the indices of their training rows.
+# New rows only update the counts along their paths. A subtree is rebuilt
+# only where its best attribute changes or a leaf stops being final, so the
+# tree always equals a full refit on all rows seen so far.
+
+import numpy as np
+from columnar import encode, contingency, best_attribute
+from criteria import get_criterion
+
+
+class IncrementalTree:
+    def __init__(self, attributes, label_key, criterion="entropy"):
+        self.attributes = list(attributes)
+        self.label_key = label_key
+        self.score = get_criterion(criterion)
+        self.categories = None
+        self.classes = None
+        self.X = None
+        self.y = None
+        self.root = None
+
+    def update(self, dataset):
+        """
+        Add new rows (list of dicts) and restructure the tree where needed.
+        """
+        if not dataset:
+            return
+        if self.root is None:
+            self.X, self.y, self.categories, self.classes = encode(dataset, self.attributes, self.label_key)
+            # X and y are views of the first len(y) rows of these buffers
+            self._X_buf, self._y_buf = self.X, self.y
+            self._value_index = [{v: i for i, v in enumerate(c)} for c in self.categories]
+            self._class_index = {c: i for i, c in enumerate(self.classes)}
+            self.root = self._grow(np.arange(len(self.y)), list(range(len(self.attributes))))
+            return
+
+        start = len(self.y)
+        X, y = self._encode_more(dataset)
+        self._append(X, y)
+        self._update(np.arange(start, len(self.y)))
+
+    def _append(self, X, y):
+        # the buffers grow geometrically, so a batch costs O(batch) amortized
+        # instead of a copy of every row seen so far
+        n, m = len(self.y), len(y)
+        if n + m > len(self._y_buf):
+            cap = max(2 * len(self._y_buf), n + m)
+            self._X_buf = np.empty((cap, X.shape[1]), dtype=np.int32, order="F")
+            self._X_buf[:n] = self.X
+            self._y_buf = np.empty(cap, dtype=np.int32)
+            self._y_buf[:n] = self.y
+        self._X_buf[n:n + m] = X
+        self._y_buf[n:n + m] = y
+        self.X, self.y = self._X_buf[:n + m], self._y_buf[:n + m]
+
+    def tree(self, leaf_counts=None):
+        """
+        The nested dict tree, in the same format as id3.id3(); leaf_counts
+        (compiled.LeafCounts) receives the class counts of every leaf.
+        """
+        if leaf_counts is not None:
+            leaf_counts.classes = list(self.classes or ())
+        if self.root is None:
+            return None
+        K = len(self.classes)
+
+        def convert(node, parent=None, key=None):
+            label = self.classes[node["label"]]
+            if "attr" not in node:
+                if leaf_counts is not None:
+                    # nodes not touched since a class was added are narrower
+                    leaf_counts.add(parent, key, np.pad(node["counts"], (0, K - len(node["counts"]))))
+                return label
+            a = node["attr"]
+            children = {}
+            for v in sorted(node["children"]):
+                value = self.categories[a][v]
+                children[value] = convert(node["children"][v], children, value)
+            return {"attr": self.attributes[a], "children": children, "default": label}
+
+        return convert(self.root)
+
+    def _encode_more(self, dataset):
+        # codes as encode() would give on all rows: new values are inserted
+        # in sorted order (_insert_values), new classes are appended
+        n = len(dataset)
+        X = np.empty((n, len(self.attributes)), dtype=np.int32, order="F")
+        for j, a in enumerate(self.attributes):
+            column = [row[a] for row in dataset]
+            new = set(column).difference(self._value_index[j])
+            if new:
+                self._insert_values(j, new)
+            index = self._value_index[j]
+            X[:, j] = np.fromiter((index[v] for v in column), dtype=np.int32, count=n)
+        y = np.empty(n, dtype=np.int32)
+        for i, row in enumerate(dataset):
+            c = row[self.label_key]
+            if c not in self._class_index:
+                self._class_index[c] = len(self.classes)
+                self.classes.append(c)
+            y[i] = self._class_index[c]
+        return X, y
+
+    def _insert_values(self, j, new):
+        """
+        Insert new values of attribute j into its sorted categories.
+
+        Steps:
+            remap   - old code -> code in the merged sorted values
+            X       - the stored column is recoded
+            tables  - every node's table of j gets its value rows moved to
+                      the new codes (zero rows for the new values)
+            children - nodes split on j rekey their children
+        """
+        old = self.categories[j]
+        values = sorted(old + list(new))
+        index = {v: i for i, v in enumerate(values)}
+        remap = np.array([index[v] for v in old], dtype=np.int32)
+        self.X[:, j] = remap[self.X[:, j]]
+        self.categories[j] = values
+        self._value_index[j] = index
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            table = node["tables"].get(j)
+            if table is not None:
+                wide = np.zeros((len(values), table.shape[1]), dtype=table.dtype)
+                wide[remap[:len(table)]] = table
+                node["tables"][j] = wide
+            if "attr" in node:
+                if node["attr"] == j:
+                    node["children"] = {int(remap[v]): child for v, child in node["children"].items()}
+                stack.extend(node["children"].values())
+
+    def _stats(self, rows, attrs):
+        # class counts, first row of each class, one table per attribute
+        K = len(self.classes)
+        labels = self.y[rows]
+        counts = np.bincount(labels, minlength=K)
+        first = np.full(K, np.iinfo(np.intp).max)
+        seen, at = np.unique(labels, return_index=True)
+        first[seen] = rows[at]
+        n_values = [len(c) for c in self.categories]
+        tables = {}
+        if attrs:
+            table, starts = contingency(self.X, labels, rows, attrs, n_values, K)
+            for a, s in zip(attrs, starts):
+                tables[a] = table[s:s + n_values[a]].copy()
+        return counts, first, tables
+
+    def _leaf(self, rows, attrs):
+        counts, first, tables = self._stats(rows, attrs)
+        node = {"counts": counts, "first": first, "tables": tables, "attrs": attrs, "rows": rows}
+        node["label"] = self._majority(node)
+        return node
+
+    def _majority(self, node):
+        ## most frequent class; ties go to the class whose first row came first
+        counts = node["counts"]
+        top = np.flatnonzero(counts == counts.max())
+        return int(top[np.argmin(node["first"][top])])
+
+    def _splits(self, node):
+        return bool(node["attrs"]) and np.count_nonzero(node["counts"]) > 1
+
+    def _best(self, node):
+        attrs = node["attrs"]
+        blocks = [node["tables"][a] for a in attrs]
+        starts = np.concatenate(([0], np.cumsum([len(b) for b in blocks])[:-1]))
+        return attrs[best_attribute(self.score(np.concatenate(blocks), starts, node["counts"]))]
+
+    def _grow(self, rows, attrs):
+        # build a subtree from scratch with an explicit stack
+        root = self._leaf(rows, attrs)
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            if not self._splits(node):
+                continue
+            self._expand(node)
+            stack.extend(node["children"].values())
+        return root
+
+    def _expand(self, node):
+        # turn a leaf into an internal node over its rows
+        best = self._best(node)
+        rows = node.pop("rows")
+        remaining = [a for a in node["attrs"] if a != best]
+        codes = self.X[rows, best]
+        node["attr"] = best
+        node["children"] = {int(v): self._leaf(rows[codes == v], remaining) for v in np.unique(codes)}
+
+    def _rows(self, node):
+        # all training rows under a node, in their original order
+        parts, stack = [], [node]
+        while stack:
+            n = stack.pop()
+            if "attr" in n:
+                stack.extend(n["children"].values())
+            else:
+                parts.append(n["rows"])
+        return np.sort(np.concatenate(parts))
+
+    def _add(self, node, rows):
+        # fold new rows into a node's counts, widening for new classes/values
+        K = len(self.classes)
+        counts, first, tables = self._stats(rows, node["attrs"])
+        grow = K - len(node["counts"])
+        if grow:
+            node["counts"] = np.pad(node["counts"], (0, grow))
+            node["first"] = np.pad(node["first"], (0, grow), constant_values=np.iinfo(np.intp).max)
+        node["counts"] += counts
+        np.minimum(node["first"], first, out=node["first"])
+        node["label"] = self._majority(node)
+        for a, t in tables.items():
+            old = node["tables"][a]
+            if old.shape != t.shape:
+                old = np.pad(old, ((0, t.shape[0] - old.shape[0]), (0, t.shape[1] - old.shape[1])))
+            node["tables"][a] = old + t
+
+    def _update(self, rows):
+        stack = [(self.root, rows)]
+        while stack:
+            node, rows = stack.pop()
+            self._add(node, rows)
+
+            if "attr" not in node:
+                node["rows"] = np.concatenate((node["rows"], rows))
+                if self._splits(node):
+                    node.update(self._grow(node.pop("rows"), node["attrs"]))
+                continue
+
+            if self._best(node) != node["attr"]:
+                # best attribute changed: rebuild this subtree only
+                rebuilt = self._grow(np.sort(np.concatenate((self._rows(node), rows))), node["attrs"])
+                node.clear()
+                node.update(rebuilt)
+                continue
+
+            remaining = [a for a in node["attrs"] if a != node["attr"]]
+            codes = self.X[rows, node["attr"]]
+            for v in np.unique(codes):
+                sub = rows[codes == v]
+                child = node["children"].get(int(v))
+                if child is None:
+                    node["children"][int(v)] = self._grow(sub, remaining)
+                else:
+                    stack.append((child, sub))
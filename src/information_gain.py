@@ -3,12 +3,13 @@ from split_entropy import split_entropy
 
 
 
-def information_gain(dataset, attribute, label_key):
+def information_gain(dataset, attribute, label_key, sample_weight=None):
+    # sample_weight: one weight per row, counts become sums of weights
     labels=[]
     for s in dataset:
         labels.append(s[label_key])
-    H_S = entropy(labels)
-    H_S_a = split_entropy(dataset, attribute, label_key)
+    H_S = entropy(labels, sample_weight)
+    H_S_a = split_entropy(dataset, attribute, label_key, sample_weight)
     return H_S - H_S_a
 
 
@@ -0,0 +1,212 @@
+#out-of-core id3
+#
+# For CSV files that do not fit in memory. The file is streamed in chunks,
+# each chunk is discretized with fitted edges, and the tree is grown one level
+# per pass: every pass routes the rows through the tree built so far and
+# accumulates class / attribute × value × class counts for the open nodes only.
+# The open nodes are counted in batches of at most LEVEL_CELLS table cells, one
+# pass per batch, so peak memory is a chunk plus the tree and one batch, not
+# the dataset or the whole level.
+
+import numpy as np
+from columnar import TIE_TOL, LEVEL_CELLS
+from criteria import get_criterion
+from utils.discretize import fit_quantile_bins_chunked, transform_with_bins
+from utils.loader import iter_csv_chunks
+
+
+def scan_schema(make_chunks, attributes, label_key, edges):
+    """
+    One pass for what the level scans need up front: the labels (in order of
+    first appearance) and the sorted values of attributes that are not binned.
+    """
+    classes = {}
+    values = {a: set() for a in attributes if a not in edges}
+    for chunk in make_chunks():
+        for c in chunk[label_key].tolist():
+            classes.setdefault(c, None)
+        for a in values:
+            values[a].update(chunk[a].tolist())
+    categories = [list(range(len(edges[a]) - 1)) if a in edges else sorted(values[a]) for a in attributes]
+    return categories, list(classes)
+
+
+def encode_chunk(chunk, attributes, label_key, edges, index, class_index):
+    # (n, n_attrs) codes and label codes of one chunk
+    binned = [a for a in attributes if a in edges]
+    bins = transform_with_bins(chunk, {a: edges[a] for a in binned}) if binned else None
+    X = np.empty((len(chunk), len(attributes)), dtype=np.int64)
+    for j, a in enumerate(attributes):
+        if a in edges:
+            codes = bins[a].to_numpy()
+            if np.isnan(codes).any():
+                raise ValueError(f"Column {a!r} has values outside its bin edges or missing values.")
+            X[:, j] = codes.astype(np.int64)
+        else:
+            X[:, j] = chunk[a].map(index[j]).to_numpy()
+    y = chunk[label_key].map(class_index).to_numpy().astype(np.int64)
+    return X, y
+
+
+def add_counts(table, keys):
+    # table.flat[k] += 1 for every key: a dense bincount when the keys
+    # outnumber the cells, otherwise only the cells the keys hit
+    if len(keys) >= table.size:
+        table += np.bincount(keys, minlength=table.size).reshape(table.shape)
+    else:
+        hit, n = np.unique(keys, return_counts=True)
+        table.flat[hit] += n
+
+
+def count_nodes(make_chunks, encode, route, nodes, n_nodes, starts, width, K):
+    """
+    One pass over make_chunks() for the open nodes `nodes` (ids among
+    n_nodes): class counts, the first row of every class and the
+    (node, Σ n_values, class) table, rows routed by route(X).
+
+    Returns:
+        tuple: (counts, first, table)
+    """
+    m = len(nodes)
+    slot = np.full(n_nodes, -1)
+    slot[nodes] = np.arange(m)
+    counts = np.zeros((m, K), dtype=np.int64)
+    first = np.full((m, K), np.iinfo(np.int64).max)
+    table = np.zeros((m, width, K), dtype=np.int64)
+    seen = 0
+    for chunk in make_chunks():
+        X, y = encode(chunk)
+        n = len(y)
+        at = slot[route(X)]
+        hit = at >= 0
+        X, y, at, rows = X[hit], y[hit], at[hit], np.flatnonzero(hit) + seen
+        seen += n
+
+        key = at * K + y
+        counts += np.bincount(key, minlength=m * K).reshape(m, K)
+        uniq, pos = np.unique(key, return_index=True)
+        first.flat[uniq] = np.minimum(first.flat[uniq], rows[pos])
+        add_counts(table, ((at[:, None] * width + starts + X) * K + y[:, None]).ravel())
+    return counts, first, table
+
+
+def id3_chunks(make_chunks, attributes, label_key, edges, leaf_counts=None, criterion="entropy"):
+    """
+    Grow the ID3 tree by re-scanning make_chunks() once per level (once per
+    LEVEL_CELLS batch of its open nodes).
+    Produces the same nested dict as id3.id3() on the fully discretized data;
+    leaf_counts (compiled.LeafCounts) receives the class counts of every leaf
+    and criterion (criteria.CRITERIA name or function) scores the splits.
+
+    make_chunks() must return a fresh iterator over the same DataFrame chunks
+    every time it is called.
+    """
+    score = get_criterion(criterion)
+    categories, classes = scan_schema(make_chunks, attributes, label_key, edges)
+    if leaf_counts is not None:
+        leaf_counts.classes = classes
+    if not classes:
+        return None
+    index = [{v: i for i, v in enumerate(c)} for c in categories]
+    class_index = {c: i for i, c in enumerate(classes)}
+    K, A = len(classes), len(attributes)
+    V = np.array([len(c) for c in categories])
+    starts = np.concatenate(([0], np.cumsum(V)[:-1]))
+    width = V.sum()
+
+    # internal nodes of the tree built so far, as flat arrays for routing:
+    # node_attr[i] (-1 for leaves/open nodes) and child ids at lut[offset[i] + code]
+    node_attr = [-1]
+    node_offset = [0]
+    lut = []
+    # open nodes of the current level: node id, remaining attrs, where to store the result
+    root = {}
+    level = [(0, list(range(A)), root, None)]
+
+    def encode(chunk):
+        return encode_chunk(chunk, attributes, label_key, edges, index, class_index)
+
+    # open nodes counted per pass over the file
+    step = max(1, LEVEL_CELLS // max(1, width * K))
+    while level:
+        m = len(level)
+        attr_arr, offset_arr, lut_arr = np.array(node_attr), np.array(node_offset), np.array(lut, dtype=np.int64)
+
+        def route(X):
+            # node on this level of every row
+            node = np.zeros(len(X), dtype=np.int64)
+            inner = attr_arr[node] >= 0
+            while inner.any():
+                cur = node[inner]
+                node[inner] = lut_arr[offset_arr[cur] + X[inner, attr_arr[cur]]]
+                inner = attr_arr[node] >= 0
+            return node
+
+        counts = np.zeros((m, K), dtype=np.int64)
+        majority = np.zeros(m, dtype=np.int64)
+        # best attribute (-1: leaf) and its value counts per open node
+        best = np.full(m, -1)
+        value_counts = [None] * m
+        for a in range(0, m, step):
+            b = min(a + step, m)
+            c, first, table = count_nodes(make_chunks, encode, route, [it[0] for it in level[a:b]], len(node_attr),
+                                          starts, width, K)
+            counts[a:b] = c
+            # majority: most frequent class, ties to the class whose first row came first
+            top = c == c.max(axis=1, keepdims=True)
+            majority[a:b] = np.argmin(np.where(top, first, np.iinfo(np.int64).max), axis=1)
+            allowed = np.zeros((b - a, A), dtype=bool)
+            for i, (_, attrs, _, _) in enumerate(level[a:b]):
+                allowed[i, attrs] = True
+            scores = np.where(allowed, score(table, starts, c), -np.inf)
+            for i in range(b - a):
+                if np.count_nonzero(c[i]) == 1 or not level[a + i][1]:
+                    continue
+                g = scores[i]
+                j = int(np.flatnonzero(g >= g.max() - TIE_TOL)[0])
+                best[a + i] = j
+                value_counts[a + i] = table[i, starts[j]:starts[j] + V[j]].sum(axis=1)
+
+        next_level = []
+        for i, (node_id, attrs, parent, key) in enumerate(level):
+            if best[i] < 0:
+                parent[key] = classes[majority[i]]
+                if leaf_counts is not None:
+                    leaf_counts.add(parent, key, counts[i])
+                continue
+            j = int(best[i])
+            node = {"attr": attributes[j], "children": {}, "default": classes[majority[i]]}
+            parent[key] = node
+            node_attr[node_id] = j
+            node_offset[node_id] = len(lut)
+            lut.extend([-1] * V[j])
+            remaining = [a for a in attrs if a != j]
+            for v in np.flatnonzero(value_counts[i]):
+                child = len(node_attr)
+                node_attr.append(-1)
+                node_offset.append(0)
+                lut[node_offset[node_id] + v] = child
+                next_level.append((child, remaining, node["children"], categories[j][v]))
+        level = next_level
+
+    return root[None]
+
+
+def id3_csv(path, label_key, attributes=None, edges=None, n_bins=4, chunksize=100_000, leaf_counts=None,
+            criterion="entropy"):
+    """
+    Fit ID3 on a CSV file without loading it: quantile edges are fitted on a
+    streamed sample (unless given), then the tree is grown level by level.
+
+    Returns:
+        tuple: (tree, edges)
+    """
+    def make_chunks():
+        return iter_csv_chunks(path, chunksize=chunksize)
+
+    if attributes is None:
+        header = next(iter_csv_chunks(path, chunksize=1))
+        attributes = [c for c in header.columns if c != label_key]
+    if edges is None:
+        edges = fit_quantile_bins_chunked(make_chunks(), attributes, n_bins=n_bins)
+    return id3_chunks(make_chunks, attributes, label_key, edges, leaf_counts, criterion), edges
@@ -1,13 +1,143 @@
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from operator import itemgetter
 from information_gain import information_gain
+from entropy import weighted_counts
+from split_entropy import table_counts
+from criteria import get_criterion, entropy_gain
 
+# gains within TIE_TOL of the maximum are ties and the first attribute wins.
+# Without it, summation-order noise decides between mathematically equal gains.
+TIE_TOL = 1e-12
 
-def selection(dataset,attributes, label_key):
+
+def argmax_gain(i_g):
+    top = max(i_g.values())
+    for a, g in i_g.items():
+        if g >= top - TIE_TOL:
+            return a
+
+
+def contingency_tables(dataset, attributes, label_key, sample_weight=None):
+    """
+    Build the class counts and every attribute × value × class count table
+    in a single pass over the rows. With sample_weight a row counts its weight.
+
+    Returns:
+        tuple: ({label: count}, {attribute: {value: {label: count}}})
+    """
+    class_counts = {}
+    tables = {a: {} for a in attributes}
+    weights = [1] * len(dataset) if sample_weight is None else sample_weight
+    for row, w in zip(dataset, weights):
+        c = row[label_key]
+        class_counts[c] = class_counts.get(c, 0) + w
+        for a in attributes:
+            counts = tables[a].setdefault(row[a], {})
+            counts[c] = counts.get(c, 0) + w
+    return class_counts, tables
+
+
+def column_tables(columns, labels, sample_weight=None):
+    """
+    contingency_tables() from {attribute: column} and the labels, one entry
+    per row: the same counts in the same order.
+    """
+    weights = [1] * len(labels) if sample_weight is None else sample_weight
+    class_counts = weighted_counts(labels, weights)
+    tables = {}
+    for a, column in columns.items():
+        table = tables[a] = {}
+        for v, c, w in zip(column, labels, weights):
+            counts = table.setdefault(v, {})
+            counts[c] = counts.get(c, 0) + w
+    return class_counts, tables
+
+
+def score_tables(class_counts, tables, attributes, score):
+    # stack the count tables into one matrix that score() rates in a single call
+    classes = list(class_counts)
+    blocks = [table_counts(tables[a], classes) for a in attributes]
+    starts = np.concatenate(([0], np.cumsum([len(b) for b in blocks])[:-1]))
+    scores = score(np.concatenate(blocks), starts, table_counts({None: class_counts}, classes)[0])
+    return dict(zip(attributes, scores.tolist()))
+
+
+def score_columns(columns, labels, sample_weight=None, criterion="entropy"):
+    # worker side of selection(n_jobs > 1): "table" scores of one chunk of columns
+    class_counts, tables = column_tables(columns, labels, sample_weight)
+    return score_tables(class_counts, tables, list(columns), get_criterion(criterion))
+
+
+def score_attributes(dataset, attributes, label_key, mode="table", sample_weight=None, criterion="entropy"):
+    # mode: "table"     - one pass builds all count tables, stacked into one
+    #                     matrix that the criterion scores in a single call
+    #       "attribute" - information_gain() per attribute (A+1 passes)
+    # criterion: criteria.CRITERIA name or function ("table" mode)
+    score = get_criterion(criterion)
+    i_g = {}
+    if mode == "table":
+        class_counts, tables = contingency_tables(dataset, attributes, label_key, sample_weight)
+        i_g = score_tables(class_counts, tables, attributes, score)
+    elif mode == "attribute":
+        if score is not entropy_gain:
+            raise ValueError("mode='attribute' computes information gain only, use mode='table'.")
+        for a in attributes:
+            i_g[a] = information_gain(dataset, a, label_key, sample_weight)
+    else:
+        raise ValueError(f"Unknown selection mode {mode!r}.")
+    return i_g
+
+
+# nodes with fewer row × attribute cells than this are scored in the calling process
+PROCESS_MIN_CELLS = 1 << 18
+
+
+def score_parallel(dataset, attributes, label_key, pool, n_jobs, sample_weight=None, criterion="entropy"):
+    """
+    "table" scores of the attributes, split into n_jobs contiguous chunks
+    scored on `pool`. Each task ships only its chunk's columns and the
+    labels, never the row dicts; a chunk is extracted while the previous
+    ones are being scored.
+
+    Returns:
+        dict: {attribute: score} in attribute order
+    """
+    size = -(-len(attributes) // n_jobs)
+    labels = list(map(itemgetter(label_key), dataset))
+    futures = []
+    for i in range(0, len(attributes), size):
+        columns = {a: list(map(itemgetter(a), dataset)) for a in attributes[i:i + size]}
+        futures.append(pool.submit(score_columns, columns, labels, sample_weight, criterion))
+    i_g = {}
+    # chunks are joined in order, so i_g keeps the attribute order
+    for future in futures:
+        i_g.update(future.result())
+    return i_g
+
+
+def selection(dataset,attributes, label_key, mode="table", n_jobs=1, sample_weight=None, criterion="entropy",
+              pool=None):
+    # mode: "table" or "attribute", see score_attributes()
+    # n_jobs > 1 scores "table" nodes of at least PROCESS_MIN_CELLS row ×
+    # attribute cells on worker processes (score_parallel): the dict kernels
+    # are pure Python and hold the GIL, so threads would not help
+    # pool: ProcessPoolExecutor reused across calls (id3() passes one for a
+    #       whole build); without it n_jobs starts one for this call
+    # sample_weight: one weight per row of dataset (weighted counts)
+    # criterion: split score, "entropy" (information gain), "gain_ratio",
+    #            "gini" or a function as in criteria.py
     if not dataset or not attributes:
         return None, {}
-    i_g = {}
-    for a in attributes:
-        i_g[a] = information_gain(dataset, a, label_key)
-    best = max(i_g, key=i_g.get)
+    if n_jobs > 1 and len(attributes) > 1 and mode == "table" and len(dataset) * len(attributes) >= PROCESS_MIN_CELLS:
+        if pool is None:
+            with ProcessPoolExecutor(n_jobs) as pool:
+                i_g = score_parallel(dataset, attributes, label_key, pool, n_jobs, sample_weight, criterion)
+        else:
+            i_g = score_parallel(dataset, attributes, label_key, pool, n_jobs, sample_weight, criterion)
+    else:
+        i_g = score_attributes(dataset, attributes, label_key, mode, sample_weight, criterion)
+    best = argmax_gain(i_g)
     return best, i_g
 
 
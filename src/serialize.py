@@ -0,0 +1,226 @@
+#binary model format
+#
+# A compiled tree (compiled.CompiledTree) stored as flat little-endian arrays
+# plus a table of the attribute names, class labels and attribute values.
+# load_compiled() maps the file with mmap and views the arrays in place, so
+# processes loading the same model share its pages and start without
+# unpickling a nested dict.
+#
+# layout, every section 8-byte aligned:
+#   header    MAGIC, version, section sizes, root
+#   feature   int32[n_nodes]    threshold int32[n_nodes]    offset int64[n_nodes]
+#   default   int32[n_nodes]    leaf_class int32[n_nodes]   lut int32[n_lut]
+#   numeric   uint8[n_attrs]    value_start int64[n_attrs + 1]
+#   table     tags uint8[n_entries], ends int64[n_entries], utf-8/binary blob
+#             entries: tested attribute names, class labels, the values of each
+#             tested attribute, then all column names of the model
+#   counts    int64[n_counts, n_classes], leaf class counts (n_counts is
+#             n_nodes, or 0 for a tree without counts), float64 when the
+#             header's counts_float is set (weighted fits)
+
+import mmap
+import os
+import struct
+import uuid
+import numpy as np
+from compiled import CompiledTree
+
+MAGIC = b"ID3M"
+FORMAT_VERSION = 1
+PREFIX = struct.Struct("<4sI")
+HEADER = struct.Struct("<4sI8qqq")
+
+# value tags of the table
+NONE, BOOL, INT, FLOAT, STR = range(5)
+
+
+def pack_value(v):
+    # (tag, bytes) of one attribute name, label or value
+    if isinstance(v, np.generic):
+        v = v.item()
+    if v is None:
+        return NONE, b""
+    if isinstance(v, bool):
+        return BOOL, bytes([v])
+    if isinstance(v, int):
+        return INT, str(v).encode()
+    if isinstance(v, float):
+        return FLOAT, struct.pack("<d", v)
+    if isinstance(v, str):
+        return STR, v.encode()
+    raise ValueError(f"Cannot store {type(v).__name__} value {v!r}; supported are None, bool, int, float and str.")
+
+
+def unpack_value(tag, raw):
+    if tag == NONE:
+        return None
+    if tag == BOOL:
+        return bool(raw[0])
+    if tag == INT:
+        return int(raw)
+    if tag == FLOAT:
+        return struct.unpack("<d", raw)[0]
+    if tag == STR:
+        return str(raw, "utf-8")
+    raise ValueError(f"Unknown value tag {tag}.")
+
+
+def save_compiled(compiled, path):
+    """
+    Write a CompiledTree in the binary format. The file is written next to
+    `path` under a temporary name and then renamed over it, so processes
+    that have the old file mapped keep reading the old model.
+    """
+    entries = list(compiled.attributes) + list(compiled.classes)
+    value_start = [len(entries)]
+    for vals in compiled.values:
+        entries.extend(vals.tolist() if isinstance(vals, np.ndarray) else vals)
+        value_start.append(len(entries))
+    entries.extend(compiled.columns)
+    packed = [pack_value(v) for v in entries]
+    blob = b"".join(raw for _, raw in packed)
+
+    sections = [
+        np.asarray(compiled.feature, dtype="<i4"),
+        np.asarray(compiled.threshold, dtype="<i4"),
+        np.asarray(compiled.offset, dtype="<i8"),
+        np.asarray(compiled.default, dtype="<i4"),
+        np.asarray(compiled.leaf_class, dtype="<i4"),
+        np.asarray(compiled.lut, dtype="<i4"),
+        np.asarray(compiled.numeric, dtype="<u1"),
+        np.asarray(value_start, dtype="<i8"),
+        np.array([tag for tag, _ in packed], dtype="<u1"),
+        np.cumsum([len(raw) for _, raw in packed], dtype="<i8"),
+        np.frombuffer(blob, dtype="<u1"),
+    ]
+    n_counts = counts_float = 0
+    if compiled.counts is not None:
+        counts_float = int(np.asarray(compiled.counts).dtype.kind == "f")
+        sections.append(np.asarray(compiled.counts, dtype="<f8" if counts_float else "<i8"))
+        n_counts = len(compiled.counts)
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, len(compiled.feature), len(compiled.lut), len(compiled.attributes),
+                         len(compiled.classes), len(compiled.columns), len(entries), len(blob), n_counts,
+                         compiled.root, counts_float)
+    directory, name = os.path.split(os.path.abspath(path))
+    tmp = os.path.join(directory, f".{name}.{uuid.uuid4().hex[:12]}.tmp")
+    try:
+        with open(tmp, "xb") as f:
+            f.write(header)
+            f.write(b"\0" * (-len(header) % 8))
+            for section in sections:
+                data = section.tobytes()
+                f.write(data)
+                f.write(b"\0" * (-len(data) % 8))
+            f.flush()
+            os.fsync(f.fileno())
+        # atomic: a reader opens either the old file or the complete new one
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def load_compiled(path):
+    """
+    Map a file written by save_compiled() and return a CompiledTree whose
+    node arrays are read-only views of the mapping.
+    """
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if len(mm) < HEADER.size or PREFIX.unpack_from(mm)[0] != MAGIC:
+        raise ValueError(f"{path!r} is not an ID3 model file.")
+    version = PREFIX.unpack_from(mm)[1]
+    if version != FORMAT_VERSION:
+        raise ValueError(f"{path!r} has format version {version}, this reader supports {FORMAT_VERSION}.")
+    fields = HEADER.unpack_from(mm)[2:]
+    n_nodes, n_lut, n_attrs, n_classes, n_columns, n_entries, n_blob, n_counts, root, counts_float = fields
+
+    pos = HEADER.size + (-HEADER.size % 8)
+
+    def section(dtype, count):
+        nonlocal pos
+        arr = np.frombuffer(mm, dtype=dtype, count=count, offset=pos)
+        pos += arr.nbytes + (-arr.nbytes % 8)
+        return arr
+
+    feature = section("<i4", n_nodes)
+    threshold = section("<i4", n_nodes)
+    offset = section("<i8", n_nodes)
+    default = section("<i4", n_nodes)
+    leaf_class = section("<i4", n_nodes)
+    lut = section("<i4", n_lut)
+    numeric = section("<u1", n_attrs).astype(bool).tolist()
+    value_start = section("<i8", n_attrs + 1)
+    tags = section("<u1", n_entries)
+    ends = section("<i8", n_entries)
+    blob = section("<u1", n_blob)
+    counts = None
+    if n_counts:
+        counts = section("<f8" if counts_float else "<i8", n_counts * n_classes).reshape(n_counts, n_classes)
+
+    # the small table is decoded, the node arrays stay in the mapping
+    starts = np.concatenate(([0], ends[:-1])) if n_entries else ends
+    entries = [unpack_value(int(t), blob[s:e].tobytes()) for t, s, e in zip(tags, starts, ends)]
+    attributes = entries[:n_attrs]
+    classes = entries[n_attrs:n_attrs + n_classes]
+    values = []
+    for j in range(n_attrs):
+        vals = entries[value_start[j]:value_start[j + 1]]
+        values.append(np.array(vals, dtype=np.float64) if numeric[j] else vals)
+    columns = entries[n_entries - n_columns:]
+    check_nodes(path, feature, threshold, offset, default, leaf_class, lut, root, numeric, values, n_classes)
+    return CompiledTree(attributes, values, numeric, classes, feature, threshold, offset, default, lut, root,
+                        leaf_class, columns, counts)
+
+
+def check_nodes(path, feature, threshold, offset, default, leaf_class, lut, root, numeric, values, n_classes):
+    """
+    Reject node arrays that CompiledTree.apply() could index out of bounds
+    or loop on. compile_tree() numbers every child (table entry or default)
+    after its node, so requiring that also rules out cycles.
+
+    Steps:
+        ranges  - root, leaf classes and tested columns in range
+        tables  - every internal node's table fits in lut, one entry per
+                  value (two for a threshold), thresholds within the values
+        order   - table entries and defaults point to later nodes
+    """
+    n_nodes = len(feature)
+
+    def fail(what):
+        raise ValueError(f"{path!r} is corrupt: {what}.")
+
+    if not n_nodes:
+        if root != -1:
+            fail("root of an empty tree")
+        return
+    if not 0 <= root < n_nodes:
+        fail("root out of range")
+    inner = np.flatnonzero(feature >= 0)
+    if feature.max() >= len(values) or feature.min() < -1:
+        fail("tested column out of range")
+    leaves = np.flatnonzero(feature < 0)
+    if len(leaves) and (leaf_class[leaves].min() < 0 or leaf_class[leaves].max() >= n_classes):
+        fail("leaf class out of range")
+    if not len(inner):
+        return
+
+    cols = feature[inner]
+    is_num = np.array(numeric, dtype=bool)[cols]
+    n_vals = np.array([len(v) for v in values], dtype=np.int64)[cols]
+    width = np.where(is_num, 2, n_vals)
+    starts = offset[inner]
+    if starts.min() < 0 or (starts + width).max() > len(lut):
+        fail("node table out of range")
+    thr = threshold[inner]
+    if (is_num & ((thr < 0) | (thr >= n_vals))).any() or (~is_num & (thr != -1)).any():
+        fail("threshold out of range")
+    owner = np.repeat(inner, width)
+    # position of every table entry: its node's offset plus 0..width-1
+    pos = np.repeat(starts - np.cumsum(width) + width, width) + np.arange(width.sum())
+    targets = lut[pos]
+    if (targets <= owner).any() or (targets >= n_nodes).any():
+        fail("child out of range")
+    if (default[inner] <= inner).any() or (default[inner] >= n_nodes).any():
+        fail("default child out of range")
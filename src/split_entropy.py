@@ -1,36 +1,64 @@
-from collections import defaultdict
-from entropy import entropy
+import numpy as np
+from entropy import entropies
 
-def split_entropy(dataset, attribute, label_key):
+def split_entropy(dataset, attribute, label_key, sample_weight=None):
     """
     Compute the weighted average entropy after splitting the dataset by a given attribute.
     H(S|A) = Σ_v (|S_v| / |S|) * H(S_v)
 
     Steps:
-
+        table    - {value: {label: count}} built in one pass; with
+                   sample_weight a row adds its weight instead of 1
+        classes  - labels in order of first appearance
+        H(S|A)   - split_entropy_from_table(table, classes)
 
     Returns:
-
+        float: conditional entropy in bits
     """
     if not dataset:
         return 0.0
 
-    # automatically initializes missing keys with empty lists
-    subsets = defaultdict(list)
-    for sample in dataset:
-        value = sample[attribute]
+    table = {}
+    classes = {}
+    weights = [1] * len(dataset) if sample_weight is None else sample_weight
+    for sample, w in zip(dataset, weights):
         label = sample[label_key]
-        subsets[value].append(label)
-        
-    N = len(dataset)
-    H_S_A = 0.0
+        classes.setdefault(label, None)
+        counts = table.setdefault(sample[attribute], {})
+        counts[label] = counts.get(label, 0) + w
 
-    for value, labels in subsets.items():
-        w = len(labels) / N
-        H_S_v = entropy(labels)
-        H_S_A += w * H_S_v
+    return split_entropy_from_table(table, list(classes))
 
-    return H_S_A
+
+def table_counts(table, classes=None):
+    """
+    Turn a {value: {label: count}} table into a (values × classes) count matrix.
+    Columns follow `classes`, by default the labels in order of appearance.
+    Integer counts give an int64 matrix, weighted counts a float64 one.
+    """
+    if classes is None:
+        classes = list(dict.fromkeys(c for counts in table.values() for c in counts))
+    column = {c: j for j, c in enumerate(classes)}
+    weighted = any(not isinstance(n, (int, np.integer)) for counts in table.values() for n in counts.values())
+    M = np.zeros((len(table), len(classes)), dtype=np.float64 if weighted else np.int64)
+    for i, counts in enumerate(table.values()):
+        for c, n in counts.items():
+            M[i, column[c]] = n
+    return M
+
+
+def split_entropy_from_table(table, classes=None):
+    """
+    H(S|A) from a precomputed count table {value: {label: count}} of one attribute,
+    so the dataset does not have to be walked again. All H(S_v) come from
+    a single entropies() call.
+    """
+    M = table_counts(table, classes)
+    n_v = M.sum(axis=1)
+    N = n_v.sum()
+    if N == 0:
+        return 0.0
+    return float((n_v / N * entropies(M)).sum())
 
 
 # if __name__ == "__main__":
@@ -0,0 +1,141 @@
+#tabular input
+#
+# ID3 takes list[dict] rows, but also a pandas DataFrame or a 2-D NumPy array
+# with column names. Tables are read column by column and never turned into
+# one dict per row (except for the dict engine, which needs rows).
+
+import numpy as np
+import pandas as pd
+
+
+def is_table(data):
+    return isinstance(data, (pd.DataFrame, np.ndarray))
+
+
+def table_columns(data, names=None):
+    """
+    {name: 1-D column} of a DataFrame, or of a 2-D ndarray whose columns are `names`.
+    """
+    if isinstance(data, pd.DataFrame):
+        return {c: data[c] for c in data.columns}
+    data = np.asarray(data)
+    if data.ndim != 2:
+        raise ValueError(f"Expected a 2-D array, got {data.ndim} dimension(s).")
+    if names is None or len(names) != data.shape[1]:
+        raise ValueError(f"A {data.shape[1]}-column array needs as many column names, got {names!r}.")
+    return {c: data[:, j] for j, c in enumerate(names)}
+
+
+def training_columns(data, attributes=None, label_key=None, y=None, columns=None):
+    """
+    Attribute columns and labels of a table for fit().
+
+    Steps:
+        names       - DataFrame columns, or `columns` for an ndarray
+                      (default: attributes, then label_key unless y is given)
+        labels      - y if given, else the label_key column
+        attributes  - default: every column but label_key
+
+    Returns:
+        tuple: (attributes, [column per attribute], labels)
+    """
+    if y is None and label_key is None:
+        raise ValueError("Table input needs label_key (a column) or y (the labels).")
+    if columns is None and not isinstance(data, pd.DataFrame):
+        if attributes is None:
+            raise ValueError("An ndarray needs attributes or columns to name its columns.")
+        columns = list(attributes) + ([] if y is not None else [label_key])
+    table = table_columns(data, columns)
+    if y is None:
+        if label_key not in table:
+            raise ValueError(f"Label column {label_key!r} not found.")
+        y = table[label_key]
+    if attributes is None:
+        attributes = [c for c in table if c != label_key]
+    missing = [a for a in attributes if a not in table]
+    if missing:
+        raise ValueError(f"Attributes {missing} are not columns of the input.")
+    labels = np.asarray(y)
+    if table and len(labels) != len(next(iter(table.values()))):
+        raise ValueError("y must have one label per row.")
+    # NaN is no category: every NaN would be a value of its own when grown,
+    # and an unseen one when predicted
+    for a in attributes:
+        if pd.isna(table[a]).any():
+            raise ValueError(f"Attribute {a!r} has missing (NaN) values.")
+    if pd.isna(labels).any():
+        raise ValueError("Labels have missing (NaN) values.")
+    return list(attributes), [table[a] for a in attributes], labels
+
+
+def rows_of(attributes, columns, labels, label_key):
+    # list[dict] rows for the dict engine
+    values = [np.asarray(c, dtype=object).tolist() for c in columns]
+    labels = np.asarray(labels, dtype=object).tolist()
+    return [dict(zip(attributes + [label_key], row)) for row in zip(*values, labels)]
+
+
+def factorize_sorted(column):
+    """
+    Codes and sorted distinct values of one column, without a Python object
+    per row; a pandas categorical column is coded from its categories.
+
+    Returns:
+        tuple: (codes, values) - values[codes[i]] is row i's value
+    """
+    cat = getattr(column, "cat", None) if isinstance(column, pd.Series) else None
+    if cat is not None:
+        codes = cat.codes.to_numpy()
+        if (codes < 0).any():
+            raise ValueError(f"Categorical column {column.name!r} has missing values.")
+        present = np.flatnonzero(np.bincount(codes, minlength=len(cat.categories)))
+        values = cat.categories[present].tolist()
+        order = sorted(range(len(values)), key=values.__getitem__)
+        rank = np.empty(len(cat.categories), dtype=np.int32)
+        rank[present[order]] = np.arange(len(order), dtype=np.int32)
+        return rank[codes], [values[i] for i in order]
+    values, codes = np.unique(np.asarray(column), return_inverse=True)
+    return codes.astype(np.int32).ravel(), values.tolist()
+
+
+def factorize_labels(labels):
+    """
+    Label codes with classes in order of first appearance, as columnar.encode().
+
+    Returns:
+        tuple: (y, classes)
+    """
+    values, first, codes = np.unique(np.asarray(labels), return_index=True, return_inverse=True)
+    order = np.argsort(first, kind="stable")
+    rank = np.empty(len(values), dtype=np.int32)
+    rank[order] = np.arange(len(values), dtype=np.int32)
+    return rank[codes.ravel()], values[order].tolist()
+
+
+def encode_table(columns, labels):
+    """
+    columnar.encode() for column data.
+
+    Returns:
+        tuple: (X, y, categories, classes)
+    """
+    X = np.empty((len(labels), len(columns)), dtype=np.int32, order="F")
+    categories = []
+    for j, column in enumerate(columns):
+        X[:, j], values = factorize_sorted(column)
+        categories.append(values)
+    y, classes = factorize_labels(labels)
+    return X, y, categories, classes
+
+
+def label_array(labels):
+    """
+    NumPy array of predicted labels: a typed array when all labels share one
+    scalar type, otherwise dtype=object (mixed types are never coerced).
+    """
+    kinds = {type(c) for c in labels}
+    if len(kinds) == 1 and (kinds <= {str, int, float, bool} or issubclass(kinds.pop(), np.generic)):
+        return np.array(labels)
+    out = np.empty(len(labels), dtype=object)
+    out[:] = labels
+    return out
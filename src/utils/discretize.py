@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 
 def fit_quantile_bins(df: pd.DataFrame, n_bins=4):
@@ -12,3 +13,30 @@ def transform_with_bins(df: pd.DataFrame, edges: dict) -> pd.DataFrame:
     for col, bins in edges.items():
         out[col] = pd.cut(df[col], bins=bins, labels=False, include_lowest=True)
     return out
+
+def fit_quantile_bins_chunked(chunks, columns, n_bins=4, sample_size=100_000, random_state=42):
+    """
+    fit_quantile_bins for data that does not fit in memory.
+    Quantiles come from a uniform reservoir sample of sample_size rows;
+    the outer edges are the exact min/max, so every row falls into a bin.
+    """
+    rng = np.random.default_rng(random_state)
+    sample, keys = None, None
+    lo, hi = {}, {}
+    for chunk in chunks:
+        chunk = chunk[columns]
+        for col in columns:
+            lo[col] = min(lo.get(col, np.inf), chunk[col].min())
+            hi[col] = max(hi.get(col, -np.inf), chunk[col].max())
+        # keep the rows with the smallest random keys: a uniform sample of everything seen
+        chunk_keys = rng.random(len(chunk))
+        sample = chunk if sample is None else pd.concat([sample, chunk], ignore_index=True)
+        keys = chunk_keys if keys is None else np.concatenate([keys, chunk_keys])
+        if len(sample) > sample_size:
+            keep = np.argpartition(keys, sample_size)[:sample_size]
+            sample, keys = sample.iloc[keep].reset_index(drop=True), keys[keep]
+
+    edges = fit_quantile_bins(sample, n_bins=n_bins)
+    for col in columns:
+        edges[col][0], edges[col][-1] = lo[col], hi[col]
+    return edges
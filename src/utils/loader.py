@@ -1,6 +1,6 @@
 import pandas as pd
 from sklearn.model_selection import train_test_split
-from typing import Tuple, List
+from typing import Iterator, List, Optional, Tuple
 
 
 def load_pima(path: str) -> Tuple[pd.DataFrame, List[int]]:
@@ -13,6 +13,11 @@ def load_pima(path: str) -> Tuple[pd.DataFrame, List[int]]:
     return X, y
 
 
+def iter_csv_chunks(path: str, chunksize: int = 100_000, usecols: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+    # stream a CSV as DataFrames of at most chunksize rows
+    yield from pd.read_csv(path, chunksize=chunksize, usecols=usecols)
+
+
 def train_test(
     path: str,
     test_size: float = 0.2,
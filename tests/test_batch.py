@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from batch import predict_chunks
+from id3 import ID3
+
+N = 4000
+
+
+def data(seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({"f0": rng.normal(size=N), "f1": rng.normal(size=N), "g": rng.choice(list("abc"), N)})
+    y = np.where((df.f0 + df.f1 > 0) | (df.g == "a"), "hi", "lo")
+    return df, y
+
+
+def model(df, y):
+    return ID3().fit(df, y=y, numeric=["f0", "f1"])
+
+
+def uneven_chunks(df, seed=1):
+    # chunk sizes far apart, so workers finish out of input order
+    rng = np.random.default_rng(seed)
+    cuts = np.sort(rng.choice(np.arange(1, N), 9, replace=False))
+    return [df.iloc[a:b] for a, b in zip([0, *cuts], [*cuts, N])]
+
+
+@pytest.mark.parametrize("n_jobs", [1, 3])
+def test_results_come_in_input_order(n_jobs):
+    df, y = data()
+    m = model(df, y)
+    parts = uneven_chunks(df)
+    out = list(m.predict_chunks(iter(parts), n_jobs=n_jobs))
+    assert [len(p) for p in out] == [len(c) for c in parts]
+    assert np.array_equal(np.concatenate(out), m.predict(df))
+    proba = np.concatenate(list(m.predict_chunks(iter(parts), n_jobs=n_jobs, proba=True)))
+    assert np.allclose(proba, m.predict_proba(df))
+
+
+def test_ndarray_and_row_chunks():
+    df, y = data()
+    m = model(df, y)
+    ref = m.predict(df)
+    arr = df.to_numpy(dtype=object)
+    out = m.predict_chunks((arr[s:s + 700] for s in range(0, N, 700)), n_jobs=2, columns=list(df.columns))
+    assert np.array_equal(np.concatenate(list(out)), ref)
+    rows = df.to_dict("records")
+    # each chunk a generator of rows
+    out = m.predict_chunks((iter(rows[s:s + 700]) for s in range(0, N, 700)), n_jobs=2)
+    assert np.array_equal(np.concatenate(list(out)), ref)
+
+
+def test_chunks_are_read_lazily_and_early_close_stops():
+    df, y = data()
+    compiled = model(df, y).compile()
+    read = []
+
+    def chunks():
+        for s in range(0, N, 200):
+            read.append(s)
+            yield df.iloc[s:s + 200]
+
+    out = predict_chunks(compiled, chunks(), n_jobs=2, max_pending=3)
+    first = next(out)
+    assert np.array_equal(first, compiled.predict_table({c: df[c][:200] for c in df.columns}, 200))
+    assert len(read) == 3
+    out.close()
+    assert len(read) == 3
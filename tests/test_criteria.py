@@ -0,0 +1,84 @@
+import math
+
+import numpy as np
+import pytest
+
+from criteria import CRITERIA, entropy_gain, gain_ratio, get_criterion, gini_gain
+from id3 import ID3
+
+
+def entropy(counts):
+    n = sum(counts)
+    return -sum(c / n * math.log2(c / n) for c in counts if c)
+
+
+def gini(counts):
+    n = sum(counts)
+    return 1 - sum((c / n) ** 2 for c in counts)
+
+
+def naive(blocks, impurity, ratio=False):
+    # every block splits the same node; per block: impurity(S) - Σ_v |S_v|/|S| · impurity(S_v), over plain lists
+    out = []
+    for block in blocks:
+        counts = [sum(col) for col in zip(*block)]
+        n = sum(counts)
+        sizes = [sum(row) for row in block]
+        gain = impurity(counts) - sum(s / n * impurity(row) for s, row in zip(sizes, block) if s)
+        if ratio:
+            split = entropy(sizes)
+            gain = gain / split if sum(s > 0 for s in sizes) > 1 else 0.0
+        out.append(gain)
+    return out
+
+
+BLOCKS = [
+    [[5, 0], [0, 5]],                  # perfect split
+    [[3, 2], [2, 3]],                  # weak split
+    [[1, 0], [1, 0], [2, 1], [1, 4]],  # many values
+    [[0, 0], [5, 5], [0, 0]],          # one non-empty value
+]
+
+
+@pytest.mark.parametrize("score, impurity, ratio", [(entropy_gain, entropy, False), (gini_gain, gini, False),
+                                                    (gain_ratio, entropy, True)])
+def test_scores_match_the_definitions(score, impurity, ratio):
+    table = np.array([row for block in BLOCKS for row in block])
+    starts = np.cumsum([0] + [len(b) for b in BLOCKS[:-1]])
+    got = score(table, starts, np.array([5, 5]))
+    assert np.allclose(got, naive(BLOCKS, impurity, ratio))
+    # float counts, and a leading axis of nodes
+    got = score(np.stack([table, 2.5 * table]), starts, np.array([[5, 5], [12.5, 12.5]]))
+    assert np.allclose(got, [naive(BLOCKS, impurity, ratio)] * 2)
+
+
+def test_gain_ratio_penalizes_many_values():
+    # an id-like attribute has the largest gain but not the largest ratio
+    rows = [{"id": i, "a": int(i % 4 < 3), "y": "p" if i % 4 < 3 or i % 8 == 3 else "q"} for i in range(16)]
+    assert ID3(criterion="entropy").fit(rows, ["id", "a"], "y").tree_["attr"] == "id"
+    assert ID3(criterion="gain_ratio").fit(rows, ["id", "a"], "y").tree_["attr"] == "a"
+
+
+@pytest.mark.parametrize("criterion", ["gini", "gain_ratio"])
+def test_engines_agree_per_criterion(criterion):
+    rng = np.random.default_rng(0)
+    rows = [{f"a{j}": int(rng.integers(2 + j)) for j in range(4)} for _ in range(500)]
+    for row in rows:
+        row["y"] = "pqr"[(row["a0"] + row["a2"]) % 3] if rng.random() < 0.7 else "pqr"[rng.integers(3)]
+    attrs = ["a0", "a1", "a2", "a3"]
+    w = rng.integers(0, 3, len(rows))
+    for weights in (None, w):
+        ref = ID3(engine="dict", criterion=criterion).fit(rows, attrs, "y", sample_weight=weights)
+        for engine in ("columnar", "histogram"):
+            model = ID3(engine=engine, criterion=criterion).fit(rows, attrs, "y", sample_weight=weights)
+            assert model.tree_ == ref.tree_
+            assert np.array_equal(model.leaf_counts_, ref.leaf_counts_)
+
+
+def test_get_criterion():
+    assert all(get_criterion(name) is fn for name, fn in CRITERIA.items())
+    assert get_criterion(gini_gain) is gini_gain
+    with pytest.raises(ValueError):
+        get_criterion("chi2")
+    with pytest.raises(ValueError):
+        ID3(criterion="chi2")
@@ -0,0 +1,218 @@
+#engine equivalence
+#
+# Every build path must give the tree and leaf counts of the reference
+# ID3(engine="dict") on the same data, and every prediction path must agree
+# with id3.walk() on that tree, unseen values and missing attributes included.
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import columnar
+import out_of_core
+import selection
+from columnar import build_parallel, encode
+from compiled import LeafCounts
+from id3 import ID3, walk
+from utils.discretize import fit_quantile_bins, transform_with_bins
+
+SEEDS = [0, 1, 2]
+ATTRIBUTES = ["a0", "a1", "a2", "a3", "a4"]
+
+
+def random_rows(seed, n=600, classes="pqr"):
+    # label driven by a0 and a1 plus noise, so the trees have a few levels
+    rng = np.random.default_rng(seed)
+    cards = rng.integers(2, 5, len(ATTRIBUTES))
+    rows = []
+    for _ in range(n):
+        row = {a: int(rng.integers(c)) for a, c in zip(ATTRIBUTES, cards)}
+        if rng.random() < 0.7:
+            label = classes[(row["a0"] + row["a1"] * (row["a2"] % 2)) % len(classes)]
+        else:
+            label = classes[rng.integers(len(classes))]
+        row["y"] = label
+        rows.append(row)
+    return rows
+
+
+def unseen_rows(seed, n=200):
+    # training values plus unseen ones (9) and rows missing an attribute
+    rng = np.random.default_rng(seed + 100)
+    rows = [{a: int(rng.integers(5)) if rng.random() < 0.9 else 9 for a in ATTRIBUTES} for _ in range(n)]
+    for row in rows[::7]:
+        del row[ATTRIBUTES[rng.integers(len(ATTRIBUTES))]]
+    return rows
+
+
+def reference(rows, sample_weight=None):
+    return ID3(engine="dict").fit(rows, ATTRIBUTES, "y", sample_weight=sample_weight)
+
+
+def assert_same_model(model, ref):
+    assert model.tree_ == ref.tree_
+    assert model.classes_ == ref.classes_
+    assert np.array_equal(model.leaf_counts_, ref.leaf_counts_)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+@pytest.mark.parametrize("order", ["depth", "breadth"])
+def test_columnar_matches_dict(seed, order):
+    rows = random_rows(seed)
+    assert_same_model(ID3(order=order, dedupe=False).fit(rows, ATTRIBUTES, "y"), reference(rows))
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+@pytest.mark.parametrize("order", ["depth", "breadth"])
+def test_columnar_weighted_matches_dict(seed, order):
+    rows = random_rows(seed)
+    w = np.random.default_rng(seed).integers(0, 4, len(rows))
+    model = ID3(order=order).fit(rows, ATTRIBUTES, "y", sample_weight=w)
+    assert_same_model(model, reference(rows, w))
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+@pytest.mark.parametrize("order", ["depth", "breadth"])
+def test_dedupe_matches_dict(seed, order, monkeypatch):
+    # build on the weighted patterns whatever their number
+    monkeypatch.setattr(columnar, "DEDUPE_MIN_RATIO", 0)
+    rows = random_rows(seed)
+    assert_same_model(ID3(order=order, dedupe=True).fit(rows, ATTRIBUTES, "y"), reference(rows))
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+@pytest.mark.parametrize("order", ["depth", "breadth"])
+def test_columnar_parallel_matches_dict(seed, order):
+    # min_rows small enough that subtrees really go to the pool
+    rows = random_rows(seed)
+    X, y, categories, classes = encode(rows, ATTRIBUTES, "y")
+    leaf_counts = LeafCounts()
+    leaf_counts.classes = list(classes)
+    tree = build_parallel(X, y, ATTRIBUTES, categories, classes, np.arange(len(y)), list(range(len(ATTRIBUTES))),
+                          order, n_jobs=2, min_rows=50, leaf_counts=leaf_counts)
+    ref = reference(rows)
+    assert tree == ref.tree_
+    assert np.array_equal(leaf_counts.gather(tree), ref.leaf_counts_)
+
+
+@pytest.mark.parametrize("seed", SEEDS[:1])
+def test_dict_parallel_matches_dict(seed, monkeypatch):
+    # every node scored on the pool
+    monkeypatch.setattr(selection, "PROCESS_MIN_CELLS", 0)
+    rows = random_rows(seed, n=300)
+    assert_same_model(ID3(engine="dict").fit(rows, ATTRIBUTES, "y", n_jobs=2), reference(rows))
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+@pytest.mark.parametrize("dedupe", [False, True])
+def test_histogram_matches_dict(seed, dedupe):
+    rows = random_rows(seed)
+    assert_same_model(ID3(engine="histogram", dedupe=dedupe).fit(rows, ATTRIBUTES, "y"), reference(rows))
+
+
+@pytest.mark.parametrize("engine", ["dict", "columnar", "histogram"])
+def test_no_attributes_gives_majority_leaf(engine):
+    rows = [{"a": 1, "y": "p"}, {"a": 2, "y": "q"}, {"a": 2, "y": "q"}]
+    model = ID3(engine=engine).fit(rows, [], "y")
+    assert model.tree_ == "q"
+    assert model.leaf_counts_.tolist() == [[1, 2]]
+    assert model.predict([{"a": 1}]).tolist() == ["q"]
+    # a table holding only the label column
+    assert ID3(engine=engine).fit(pd.DataFrame({"y": ["p", "q", "q"]}), label_key="y").tree_ == "q"
+
+
+def child_order(tree):
+    # the nested children keys in dict order (== ignores it)
+    if not isinstance(tree, dict):
+        return tree
+    return [(v, child_order(child)) for v, child in tree["children"].items()]
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_incremental_matches_dict(seed):
+    # later batches bring smaller, unseen values of a0 and a1
+    rows = sorted(random_rows(seed), key=lambda row: (-row["a0"], -row["a1"]))
+    model = ID3()
+    rng = np.random.default_rng(seed)
+    cuts = np.sort(rng.choice(np.arange(1, len(rows)), 4, replace=False)).tolist()
+    for start, end in zip([0] + cuts, cuts + [len(rows)]):
+        model.partial_fit(rows[start:end], ATTRIBUTES, "y")
+        ref = reference(rows[:end])
+        assert_same_model(model, ref)
+        assert child_order(model.tree_) == child_order(ref.tree_)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+@pytest.mark.parametrize("cells", [out_of_core.LEVEL_CELLS, 1])
+def test_out_of_core_matches_dict(seed, cells, tmp_path, monkeypatch):
+    # cells=1: every open node counted in a pass of its own
+    monkeypatch.setattr(out_of_core, "LEVEL_CELLS", cells)
+    rng = np.random.default_rng(seed)
+    n = 800
+    df = pd.DataFrame(rng.normal(size=(n, 3)), columns=["f0", "f1", "f2"])
+    df["label"] = ((df.f0 + df.f1 * (df.f2 > 0) + rng.normal(0, 0.5, n)) > 0).astype(int)
+    path = tmp_path / "data.csv"
+    df.to_csv(path, index=False)
+    df = pd.read_csv(path)
+    attrs = ["f0", "f1", "f2"]
+    edges = fit_quantile_bins(df[attrs], 4)
+
+    model = ID3().fit_csv(str(path), "label", edges=edges, chunksize=128)
+    rows = transform_with_bins(df[attrs], edges).assign(label=df["label"]).to_dict("records")
+    ref = ID3(engine="dict").fit(rows, attrs, "label")
+    assert model.tree_ == ref.tree_
+    assert np.array_equal(model.leaf_counts_, ref.leaf_counts_)
+
+
+def numeric_model(seed):
+    # columnar thresholds, so the threshold branches of every predictor run too
+    rng = np.random.default_rng(seed)
+    rows = random_rows(seed)
+    for row in rows:
+        row["c"] = float(np.round(rng.normal(), 2))
+        if row["c"] > 0.5:
+            row["y"] = "r"
+    return ID3().fit(rows, ATTRIBUTES + ["c"], "y", numeric=["c"])
+
+
+def fitted_models(seed):
+    rows = random_rows(seed)
+    return [ID3(engine=engine).fit(rows, ATTRIBUTES, "y") for engine in ("dict", "columnar")] + [numeric_model(seed)]
+
+
+def prediction_rows(seed):
+    rows = unseen_rows(seed)
+    rng = np.random.default_rng(seed)
+    for row in rows[1::3]:
+        row["c"] = float(np.round(rng.normal(), 2))
+    return rows
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_compiled_matches_walk(seed):
+    rows = prediction_rows(seed)
+    for model in fitted_models(seed):
+        expected = [walk(model.tree_, row) for row in rows]
+        assert model.compile().predict(rows).tolist() == expected
+        assert model.predict(rows).tolist() == expected
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_codegen_matches_walk(seed):
+    rows = prediction_rows(seed)
+    for model in fitted_models(seed):
+        predict = model.predictor()
+        assert [predict(row) for row in rows] == [walk(model.tree_, row) for row in rows]
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_loaded_matches_walk(seed, tmp_path):
+    rows = prediction_rows(seed)
+    for i, model in enumerate(fitted_models(seed)):
+        path = tmp_path / f"model{i}.bin"
+        model.save(str(path))
+        loaded = ID3.load(str(path))
+        expected = [walk(model.tree_, row) for row in rows]
+        assert loaded.predict(rows).tolist() == expected
+        assert [loaded.predictor()(row) for row in rows] == expected
+        assert np.allclose(loaded.predict_proba(rows), model.predict_proba(rows))
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ensemble import BaggedID3, bootstrap
+from id3 import ID3
+
+ATTRIBUTES = ["a0", "a1", "a2", "a3"]
+
+
+def random_rows(seed, n=400):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for _ in range(n):
+        row = {a: int(rng.integers(4)) for a in ATTRIBUTES}
+        row["y"] = "pq"[(row["a0"] + row["a1"]) % 2] if rng.random() < 0.8 else "pq"[rng.integers(2)]
+        rows.append(row)
+    return rows
+
+
+def trees(model):
+    return [(m.tree_, m.leaf_counts_.tolist()) for m in model.estimators_]
+
+
+@pytest.mark.parametrize("max_features", [None, 2])
+def test_serial_and_parallel_fits_are_identical(max_features):
+    rows = random_rows(0)
+    serial = BaggedID3(n_estimators=6, random_state=7, max_features=max_features).fit(rows, ATTRIBUTES, "y")
+    parallel = BaggedID3(n_estimators=6, random_state=7, max_features=max_features).fit(rows, ATTRIBUTES, "y",
+                                                                                         n_jobs=3)
+    assert trees(serial) == trees(parallel)
+    assert np.array_equal(serial.predict(rows), parallel.predict(rows))
+    other = BaggedID3(n_estimators=6, random_state=8, max_features=max_features).fit(rows, ATTRIBUTES, "y")
+    assert trees(other) != trees(serial)
+
+
+def test_every_tree_is_id3_on_its_bootstrap():
+    rows = random_rows(1)
+    model = BaggedID3(n_estimators=4, max_samples=0.5, random_state=3).fit(rows, ATTRIBUTES, "y")
+    seeds = np.random.SeedSequence(3).spawn(4)
+    for seed, tree in zip(seeds, model.estimators_):
+        sample = [rows[i] for i in bootstrap(seed, len(rows), 0.5)]
+        ref = ID3(engine="dict").fit(sample, ATTRIBUTES, "y")
+        assert tree.tree_ == ref.tree_
+        # count columns in the ensemble's class order, that of the full data
+        order = [ref.classes_.index(c) for c in model.classes_]
+        assert np.array_equal(tree.leaf_counts_, ref.leaf_counts_[:, order])
+
+
+def test_votes_and_table_input():
+    rows = random_rows(2)
+    df = pd.DataFrame(rows)
+    model = BaggedID3(n_estimators=5, random_state=0).fit(df, label_key="y")
+    votes = model.votes(df)
+    assert (votes.sum(axis=1) == 5).all()
+    assert model.predict(df).tolist() == model.predict(df.to_dict("records")).tolist()
+    assert np.allclose(model.predict_proba(df).sum(axis=1), 1.0)
+    assert trees(model) == trees(BaggedID3(n_estimators=5, random_state=0).fit(rows, ATTRIBUTES, "y"))
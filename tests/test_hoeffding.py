@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from hoeffding import HoeffdingTree
+
+ATTRIBUTES = ["a0", "a1", "a2", "a3"]
+
+
+def stream(seed, n, noise=0.05):
+    # label = a0 or (a1 and a2) with a little noise; a3 is irrelevant
+    rng = np.random.default_rng(seed)
+    for _ in range(n):
+        row = {a: int(rng.integers(2)) for a in ATTRIBUTES}
+        row["y"] = str(row["a0"] | (row["a1"] & row["a2"]) if rng.random() > noise else rng.integers(2))
+        yield row
+
+
+def leaves(node):
+    if "attr" not in node:
+        return [node]
+    return [leaf for child in node["children"].values() for leaf in leaves(child)]
+
+
+def test_learns_the_concept_from_a_generator():
+    model = HoeffdingTree(ATTRIBUTES, "y", grace_period=100).fit(stream(0, 20_000))
+    assert model.tree_["attr"] == "a0"
+    test = list(stream(1, 2000, noise=0.0))
+    accuracy = np.mean([p == row["y"] for p, row in zip(model.predict(test), test)])
+    assert accuracy > 0.95
+
+
+def test_batches_equal_one_pass():
+    rows = list(stream(2, 5000))
+    one = HoeffdingTree(ATTRIBUTES, "y", grace_period=50).fit(rows)
+    parts = HoeffdingTree(ATTRIBUTES, "y", grace_period=50)
+    for start in range(0, len(rows), 333):
+        parts.partial_fit(rows[start:start + 333])
+    assert parts.tree_ == one.tree_
+    assert one.predict(rows[0]) == one.predict([rows[0]])[0]
+
+
+def test_split_test_uses_only_the_leafs_own_rows():
+    # after a split every child tests on the rows its tables saw, not on
+    # the class counts it inherited from its parent
+    model = HoeffdingTree(ATTRIBUTES, "y", grace_period=200).fit(stream(3, 3000))
+    assert "attr" in model._root
+    for leaf in leaves(model._root):
+        n = sum(leaf["stats"].values())
+        assert n == leaf["seen"]
+        for table in leaf["tables"].values():
+            assert sum(sum(counts.values()) for counts in table.values()) == n
+        assert sum(leaf["counts"].values()) >= n
+
+
+def test_memory_bounds():
+    model = HoeffdingTree(ATTRIBUTES, "y", grace_period=20, tie_threshold=1.0, max_leaves=3)
+    model.fit(stream(4, 5000, noise=0.3))
+    assert len(leaves(model._root)) <= 3
+
+    rng = np.random.default_rng(5)
+    rows = [{"id": int(i), "a0": int(rng.integers(2)), "y": "p" if rng.random() < 0.5 else "q"} for i in range(500)]
+    model = HoeffdingTree(["id", "a0"], "y", grace_period=1000, max_values=10).fit(rows)
+    assert len(model._root["tables"]["id"]) == 10
+
+
+def test_tree_view_is_cached_until_the_next_update():
+    model = HoeffdingTree(ATTRIBUTES, "y", grace_period=50)
+    assert model.tree_ is None
+    rows = list(stream(6, 1000))
+    model.partial_fit(rows[:500])
+    tree = model.tree_
+    assert model.tree_ is tree
+    model.partial_fit(rows[500:])
+    assert model._tree_ is None
+    assert model.tree_ == model._tree(model._root)
+
+
+def test_predict_before_fit_raises():
+    with pytest.raises(RuntimeError):
+        HoeffdingTree(ATTRIBUTES, "y").predict({"a0": 0})
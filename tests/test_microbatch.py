@@ -0,0 +1,88 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from id3 import ID3
+from microbatch import MicroBatchPredictor
+
+ROWS = [{"a": a, "b": b, "y": "p" if a == 1 or b == 2 else "q"} for a in range(3) for b in range(4)] * 3
+
+
+def model():
+    return ID3().fit(ROWS, ["a", "b"], "y")
+
+
+def test_concurrent_requests_are_batched():
+    m = model()
+    rows = [{"a": r["a"], "b": r["b"]} for r in ROWS[:10]]
+
+    async def main():
+        async with MicroBatchPredictor(m, max_batch_size=4, max_wait=0.01) as predictor:
+            labels = await asyncio.gather(*(predictor.predict(row) for row in rows))
+            return labels, predictor.metrics()
+
+    labels, metrics = asyncio.run(main())
+    assert labels == m.predict(rows).tolist()
+    assert metrics["batch_sizes"] == {4: 2, 2: 1}
+    assert metrics["batches"] == 3 and metrics["rows"] == 10
+    assert metrics["max_queue_depth"] == 10 and metrics["queue_depth"] == 0
+    assert metrics["mean_batch_size"] == pytest.approx(10 / 3)
+
+
+def test_mixed_labels_and_probabilities():
+    m = model()
+    rows = [{"a": r["a"], "b": r["b"]} for r in ROWS[:6]] + [{"a": 7}]
+
+    async def main():
+        predictor = MicroBatchPredictor(m, max_batch_size=64, max_wait=0.01)
+        out = await asyncio.gather(*(predictor.predict(row) if i % 2 else predictor.predict_proba(row)
+                                     for i, row in enumerate(rows)))
+        await predictor.close()
+        return out, predictor.metrics()
+
+    out, metrics = asyncio.run(main())
+    P = m.predict_proba(rows)
+    labels = m.predict(rows)
+    for i, got in enumerate(out):
+        if i % 2:
+            assert got == labels[i]
+        else:
+            assert np.allclose(got, P[i])
+    assert metrics["batch_sizes"] == {len(rows): 1}
+
+
+def test_lone_request_waits_at_most_max_wait():
+    m = model()
+
+    async def main():
+        predictor = MicroBatchPredictor(m, max_batch_size=100, max_wait=0.05)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        label = await predictor.predict({"a": 1, "b": 0})
+        waited = loop.time() - start
+        await predictor.close()
+        return label, waited, predictor.metrics()
+
+    label, waited, metrics = asyncio.run(main())
+    assert label == "p"
+    assert 0.04 <= waited < 1.0
+    assert metrics["batch_sizes"] == {1: 1}
+
+
+def test_closed_predictor_and_bad_arguments():
+    m = model()
+
+    async def main():
+        predictor = MicroBatchPredictor(m)
+        await predictor.close()
+        with pytest.raises(RuntimeError):
+            await predictor.predict({"a": 1})
+
+    asyncio.run(main())
+    with pytest.raises(ValueError):
+        MicroBatchPredictor(m, max_batch_size=0)
+    with pytest.raises(ValueError):
+        MicroBatchPredictor(m, max_wait=-1)
+    with pytest.raises(RuntimeError):
+        MicroBatchPredictor(ID3())
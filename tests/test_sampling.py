@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import columnar
+from columnar import build, build_parallel, encode, node_rng, as_seed
+from id3 import ID3
+from selection import selection
+
+
+def data(seed, n=2000, A=8):
+    # a0 and a1 drive the label, c (numeric) flips it; the rest is noise
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({f"a{j}": rng.integers(0, 2 + j % 4, n) for j in range(A)})
+    df["c"] = np.round(rng.normal(size=n), 2)
+    y = (df.a0 + (df.a1 % 2) * 2) % 3
+    y = np.where(df.c > 0.3, y, (y + 1) % 3)
+    y = np.where(rng.random(n) < 0.2, rng.integers(0, 3, n), y)
+    return df, pd.Series(y).astype(str)
+
+
+def fit(df, y, numeric=("c",), sample_weight=None, **kw):
+    return ID3(**kw).fit(df, y=y, numeric=list(numeric), sample_weight=sample_weight)
+
+
+@pytest.mark.parametrize("max_features", ["sqrt", 3, 0.5])
+@pytest.mark.parametrize("weighted", [False, True])
+def test_max_features_tree_depends_only_on_the_seed(max_features, weighted):
+    df, y = data(0)
+    w = np.random.default_rng(1).random(len(y)) if weighted else None
+    kw = dict(max_features=max_features, random_state=11, sample_weight=w)
+    depth = fit(df, y, order="depth", **kw)
+    assert fit(df, y, order="breadth", **kw).tree_ == depth.tree_
+    assert fit(df, y, order="depth", dedupe=False, **kw).tree_ == depth.tree_
+    assert fit(df, y, order="depth", **kw).tree_ == depth.tree_
+    assert fit(df, y, order="depth", **{**kw, "random_state": 12}).tree_ != depth.tree_
+
+
+def test_max_features_parallel_build_matches_serial():
+    df, y = data(2)
+    X, codes, categories, classes = encode(df.assign(y=y).to_dict("records"), list(df.columns), "y")
+    args = (X, codes, list(df.columns), categories, classes, np.arange(len(codes)), list(range(df.shape[1])))
+    serial = build(*args, "depth", max_features="sqrt", random_state=5)
+    parallel = build_parallel(*args, "depth", n_jobs=2, min_rows=200, max_features="sqrt", random_state=5)
+    assert parallel == serial
+
+
+def test_every_node_chooses_among_its_draw():
+    df, y = data(3)
+    df = df.drop(columns="c")
+    rows = df.assign(y=y).to_dict("records")
+    attrs = list(df.columns)
+    for seed in range(5):
+        root = fit(df, y, numeric=(), max_features=2, random_state=seed).tree_["attr"]
+        pair = [attrs[i] for i in np.sort(node_rng(as_seed(seed), ()).choice(len(attrs), 2, replace=False))]
+        assert root == selection(rows, pair, "y")[0]
+
+
+def test_max_features_at_least_all_changes_nothing():
+    df, y = data(4)
+    base = fit(df, y)
+    for max_features in (None, df.shape[1], 1.0):
+        assert fit(df, y, max_features=max_features, random_state=3).tree_ == base.tree_
+
+
+def test_sample_rows_settles_large_nodes_reproducibly(monkeypatch):
+    df, y = data(5, n=8000)
+    exact = fit(df, y)
+    calls = []
+    bound = columnar.hoeffding_bound
+    monkeypatch.setattr(columnar, "hoeffding_bound", lambda *a: calls.append(a) or bound(*a))
+    depth = fit(df, y, order="depth", sample_rows=500, random_state=1)
+    # the sample decides at least the root, and picks the exact root
+    assert calls
+    assert depth.tree_["attr"] == exact.tree_["attr"]
+    assert np.array_equal(depth.leaf_counts_.sum(axis=0), exact.leaf_counts_.sum(axis=0))
+    assert fit(df, y, order="breadth", sample_rows=500, random_state=1).tree_ == depth.tree_
+    assert fit(df, y, order="depth", sample_rows=500, random_state=1).tree_ == depth.tree_
+    # nodes under SAMPLE_MIN_RATIO × sample_rows rows are always scored exactly
+    assert fit(df, y, sample_rows=len(y)).tree_ == exact.tree_
+
+
+def test_sample_rows_near_tie_falls_back_to_exact():
+    # a duplicated best column: the sample cannot tell the two apart
+    df, y = data(6, n=8000)
+    df = df.assign(dup=df["a0"])[["dup"] + list(df.columns)]
+    assert fit(df, y).tree_["attr"] == "dup"
+    assert fit(df, y, sample_rows=500, random_state=4).tree_["attr"] == "dup"
+
+
+@pytest.mark.parametrize("kw", [dict(max_features=0), dict(max_features="x"), dict(max_features=1.5),
+                                dict(sample_rows=0), dict(sample_rows=2.5), dict(delta=0), dict(delta=1),
+                                dict(sample_rows=10, criterion=lambda table, starts, counts: table.sum())])
+def test_bad_parameters_raise(kw):
+    with pytest.raises(ValueError):
+        ID3(**kw)
+
+
+@pytest.mark.parametrize("engine", ["dict", "histogram"])
+def test_other_engines_reject_sampling(engine):
+    df, y = data(7, n=100)
+    with pytest.raises(ValueError):
+        ID3(engine, max_features=2).fit(df, y=y)
+    with pytest.raises(ValueError):
+        ID3(engine, sample_rows=10).fit(df, y=y)
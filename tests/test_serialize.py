@@ -0,0 +1,35 @@
+import struct
+
+import numpy as np
+import pytest
+
+from id3 import ID3
+from serialize import FORMAT_VERSION, PREFIX, load_compiled, save_compiled
+
+ROWS = [{"a": a, "b": b, "y": "p" if a == 1 or b == 2 else "q"} for a in range(3) for b in range(3)]
+
+
+@pytest.mark.parametrize("weights", [None, np.linspace(0.5, 2.0, len(ROWS))])
+def test_round_trip_keeps_counts(weights, tmp_path):
+    model = ID3().fit(ROWS, ["a", "b"], "y", sample_weight=weights)
+    path = str(tmp_path / "model.bin")
+    save_compiled(model.compile(), path)
+    loaded = load_compiled(path)
+    assert loaded.to_tree() == model.tree_
+    assert loaded.counts.dtype == model.compile().counts.dtype
+    assert np.array_equal(loaded.counts, model.compile().counts)
+
+
+def test_other_files_and_versions_are_rejected(tmp_path):
+    path = tmp_path / "model.bin"
+    save_compiled(ID3().fit(ROWS, ["a", "b"], "y").compile(), str(path))
+    data = path.read_bytes()
+    path.write_bytes(PREFIX.pack(b"ID3M", FORMAT_VERSION + 1) + data[PREFIX.size:])
+    with pytest.raises(ValueError, match="version"):
+        load_compiled(str(path))
+    path.write_bytes(b"JUNK" + data[4:])
+    with pytest.raises(ValueError, match="not an ID3 model"):
+        load_compiled(str(path))
+    path.write_bytes(data[:struct.calcsize("<4sI")])
+    with pytest.raises(ValueError):
+        load_compiled(str(path))
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from id3 import ID3, walk
+
+ATTRIBUTES = ["s", "i", "c"]
+ENGINES = ["dict", "columnar", "histogram"]
+
+
+def frame(seed, n=300):
+    # a string, an integer and a categorical column (with an unused category)
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "s": rng.choice(["a", "b", "c"], n),
+        "i": rng.integers(0, 4, n),
+        "c": pd.Categorical(rng.choice(["z", "x", "y"], n), categories=["z", "y", "x", "w"]),
+    })
+    noise = rng.random(n) < 0.2
+    df["label"] = np.where(noise, rng.choice(["p", "q"], n), np.where((df.s == "a") | (df.c == "x"), "p", "q"))
+    return df
+
+
+def records(df):
+    return df.astype({"c": object}).to_dict("records")
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_table_inputs_match_rows(engine):
+    df = frame(0)
+    ref = ID3(engine=engine).fit(records(df), ATTRIBUTES, "label")
+    plain = df.astype({"c": object})
+    fits = [
+        dict(data=df, label_key="label"),
+        dict(data=df[ATTRIBUTES], y=df["label"]),
+        dict(data=plain[ATTRIBUTES].to_numpy(), attributes=ATTRIBUTES, y=df["label"].to_numpy()),
+        dict(data=plain.to_numpy(), label_key="label", columns=ATTRIBUTES + ["label"]),
+    ]
+    for kw in fits:
+        model = ID3(engine=engine).fit(**kw)
+        assert model.tree_ == ref.tree_
+        assert model.attributes_ == ATTRIBUTES
+        assert np.array_equal(model.leaf_counts_, ref.leaf_counts_)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_table_predictions_match_walk(engine):
+    model = ID3(engine=engine).fit(frame(1), label_key="label")
+    test = frame(2, n=100).drop(columns="label")
+    # unseen values, in plain and categorical columns
+    test["s"] = test["s"].where(test.index % 7 != 0, "zz")
+    test["c"] = test["c"].cat.add_categories(["v"])
+    test.loc[test.index % 5 == 0, "c"] = "v"
+    expected = [walk(model.tree_, row) for row in records(test)]
+    assert model.predict(test).tolist() == expected
+    assert model.predict(records(test)).tolist() == expected
+    assert model.predict(test.astype({"c": object}).to_numpy(), columns=ATTRIBUTES).tolist() == expected
+    assert np.allclose(model.predict_proba(test), model.predict_proba(records(test)))
+
+
+def test_nan_prediction_value_is_unseen():
+    model = ID3().fit(frame(3), label_key="label")
+    test = frame(4, n=50).drop(columns="label").astype({"s": object})
+    test.loc[::3, "s"] = np.nan
+    assert model.predict(test).tolist() == model.predict(records(test)).tolist()
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_nan_in_training_columns_raises(engine):
+    df = frame(5).astype({"s": object})
+    df.loc[::10, "s"] = np.nan
+    with pytest.raises(ValueError, match="'s'"):
+        ID3(engine=engine).fit(df, label_key="label")
+    if engine != "dict":
+        with pytest.raises(ValueError, match="'s'"):
+            ID3(engine=engine).fit(records(df), ATTRIBUTES, "label")
+    with pytest.raises(ValueError, match="Labels"):
+        ID3(engine=engine).fit(frame(5)[ATTRIBUTES], y=pd.Series([np.nan] + ["p"] * 299, dtype=object))
+
+
+def test_table_argument_errors():
+    df = frame(6)
+    with pytest.raises(ValueError):
+        ID3().fit(df)
+    with pytest.raises(ValueError):
+        ID3().fit(df.to_numpy(), label_key="label")
+    with pytest.raises(ValueError):
+        ID3().fit(df, ["s", "nope"], "label")
+    with pytest.raises(ValueError):
+        ID3().fit(df[ATTRIBUTES], y=df["label"][:-1])